@@ -27,12 +27,24 @@ class AbstractBoard(object):
 	def __init__(self):
 		pass
 
-	def naively_solvable(self):
-		self = self.backtrack_clone()
-		while self.piececnt > 0:
-			moves = list(self.possible_moves())
+	def structural_deadlock(self):
+		"""Returns a description of why the board is unsolvable if that can be
+		seen from its structure alone, or None otherwise."""
+		return None
+
+	def naive_solution(self):
+		"""Plays random moves until the board is cleared or stuck. Returns the
+		moves played if the board was cleared and None otherwise."""
+		state = self.backtrack_engine().backtrack_clone()
+		solution = [ ]
+		while not state.backtrack_condition_satisfied():
+			moves = list(state.backtrack_choices())
 			if len(moves) == 0:
-				return False
-			move = random.sample(moves, 1)
-			self.remove_piece(move[0][0], move[0][1])
-		return True
+				return None
+			move = random.choice(moves)
+			state.backtrack_makechoice(move)
+			solution.append(move)
+		return [ self.backtrack_translate(move) for move in solution ]
+
+	def naively_solvable(self):
+		return self.naive_solution() is not None
@@ -21,6 +21,14 @@
 #
 #	Johannes Bauer <JohannesBauer@gmx.de>
 
+import time
+import collections
+
+from TranspositionTable import TranspositionTable
+
+SolverResult = collections.namedtuple("SolverResult", [ "status", "moves", "nodes", "elapsed", "maxdepth", "pruned", "tthits" ])
+SolverProgress = collections.namedtuple("SolverProgress", [ "nodes", "nodes_per_sec", "depth", "maxdepth", "pruned", "tthits" ])
+
 class BacktrackingSolvable(object):
 	"""Interface that needs to be implemented in order to be solvable by the
 	BacktrackingSolver."""
@@ -37,46 +45,159 @@ class BacktrackingSolvable(object):
 		raise Exception(NotImplemented)
 
 	def backtrack_choices(self):
+		"""Returns an iterable over all choices possible from the current
+		state. The solver consumes it lazily and may alter the state while
+		doing so; however, it is always restored to the state the choices
+		were created in before the next one is requested."""
 		raise Exception(NotImplemented)
 
+	def backtrack_allchoices(self):
+		"""Returns all choices possible from the current state, without any of
+		the reductions backtrack_choices() may apply."""
+		return self.backtrack_choices()
+
+	def backtrack_hash(self):
+		"""Returns a hash of the current position, or None if the state cannot
+		be hashed. When hashes are available, the solver uses a transposition
+		table to avoid re-exploring positions proven to be dead ends."""
+		return None
+
+	def backtrack_pruned(self):
+		"""Returns the number of choices this state has pruned so far because
+		they were equivalent to, or dominated by, other choices."""
+		return 0
+
+	def backtrack_sleepset(self, sleeping, choice):
+		"""Returns those of the already explored choices (sleeping) that
+		commute with choice and need not be tried again after it."""
+		return ( )
+
+	def backtrack_engine(self):
+		"""Returns the state the solver actually operates on. States which have
+		a faster representation of themselves may return it here; choices
+		made on that engine are mapped back by backtrack_translate()."""
+		return self
+
+	def backtrack_translate(self, choice):
+		return choice
+
 class BacktrackingSolver(object):
-	def __init__(self, initialstate):
+	# Number of nodes after which the deadline and cancellation are checked
+	_CHECK_INTERVAL = 256
+
+	def __init__(self, initialstate, ttsize = 1000000):
 		if not isinstance(initialstate, BacktrackingSolvable):
 			raise Exception("Given state is not BacktrackingSolvable.")
 		self._initstate = initialstate
+		self._ttsize = ttsize
+		self._ttable = None
+		self._pruned = 0
+
+	@property
+	def ttable(self):
+		return self._ttable
+
+	@property
+	def pruned(self):
+		return self._pruned
 
 	def solve(self):
-		state = self._initstate.backtrack_clone()
+		"""Returns the list of moves that solves the board or None if the
+		board is unsolvable."""
+		return self.run().moves
+
+	def run(self, nodelimit = None, deadline = None, cancel = None, progress = None, progressinterval = 10000):
+		"""Searches for a solution and returns a SolverResult. The search can
+		be bounded by a maximum number of nodes (nodelimit), an absolute
+		time.time() value (deadline) and an event-like object whose
+		is_set() returns True when the search should be abandoned (cancel).
+		If any of them strikes before the search is decided, the status of
+		the result is "unknown". If given, progress is called with a
+		SolverProgress every progressinterval nodes."""
+		t0 = time.time()
+		state = self._initstate.backtrack_engine().backtrack_clone()
 		moves = [ ]
 		choices = [  ]
+		if (self._ttsize is not None) and (self._ttsize > 0) and (state.backtrack_hash() is not None):
+			ttable = TranspositionTable(self._ttsize)
+		else:
+			ttable = None
+		self._ttable = ttable
+
+		def result(status):
+			self._pruned = state.backtrack_pruned() + slept
+			if status == "solved":
+				solution = [ self._initstate.backtrack_translate(move) for move in moves ]
+			else:
+				solution = None
+			return SolverResult(status = status, moves = solution, nodes = nodes, elapsed = time.time() - t0, maxdepth = maxdepth, pruned = self._pruned, tthits = ttable.hits if (ttable is not None) else 0)
 
-		iters = 0
+		def next_choice():
+			nonlocal slept
+			choice = next(choices[-1], None)
+			while (choice is not None) and (choice in sleeping[-1]):
+				slept += 1
+				choice = next(choices[-1], None)
+			return choice
+
+		nodes = 0
+		maxdepth = 0
+		slept = 0
+
+		# Per level, the choices that are asleep. Every explored choice joins
+		# its level's sleep set.
+		sleeping = [ ]
+		nextsleeping = set()
 		while True:
 			solvestate = state.backtrack_condition_satisfied()
 			if solvestate:
 				# Solution found
-				break
+				return result("solved")
 			elif solvestate is None:
 				# Unsolvable from here on, backtrack
-				state.backtrack_reversechoice(moves.pop())
+				move = moves.pop()
+				state.backtrack_reversechoice(move)
+				sleeping[-1].add(move)
+			elif (ttable is not None) and (state.backtrack_hash() in ttable):
+				# Position already known to be a dead end
+				choices.append(iter(( )))
+				sleeping.append(nextsleeping)
 			else:
-				# No solution found yet, continue to get choices
-				choices.append(list(state.backtrack_choices()))
-			while len(choices[-1]) == 0:
+				# No solution found yet, continue to get choices. They are
+				# generated lazily, so that a branch only pays for the
+				# candidates it actually tries.
+				choices.append(iter(state.backtrack_choices()))
+				sleeping.append(nextsleeping)
+
+			choice = next_choice()
+			while choice is None:
 				# No more choices, backtrack
+				if ttable is not None:
+					ttable.add(state.backtrack_hash())
 				if len(moves) == 0:
 					# Completely unsolvable
-					return
-				state.backtrack_reversechoice(moves.pop())
+					return result("unsolvable")
+				move = moves.pop()
+				state.backtrack_reversechoice(move)
 				choices.pop()
+				sleeping.pop()
+				sleeping[-1].add(move)
+				choice = next_choice()
 
-			iters += 1
-			if (iters % 1000) == 0:
-				print(state.piececnt)
+			if (nodelimit is not None) and (nodes >= nodelimit):
+				return result("unknown")
+			nodes += 1
+			if (nodes % self._CHECK_INTERVAL) == 0:
+				if (deadline is not None) and (time.time() >= deadline):
+					return result("unknown")
+				if (cancel is not None) and cancel.is_set():
+					return result("unknown")
+			if (progress is not None) and ((nodes % progressinterval) == 0):
+				elapsed = time.time() - t0
+				progress(SolverProgress(nodes = nodes, nodes_per_sec = nodes / elapsed if (elapsed > 0) else 0, depth = len(moves), maxdepth = maxdepth, pruned = state.backtrack_pruned(), tthits = ttable.hits if (ttable is not None) else 0))
 
 			# Perform a choice
-			choice = choices[-1].pop()
+			nextsleeping = set(state.backtrack_sleepset(sleeping[-1], choice))
 			moves.append(choice)
 			state.backtrack_makechoice(choice)
-		return moves
-
+			maxdepth = max(maxdepth, len(moves))
@@ -0,0 +1,62 @@
+#!/usr/bin/python3
+#
+#	pyglmahjong - Python OpenGL Mahjong and Shisen implementation
+#	Copyright (C) 2015-2018 Johannes Bauer
+#
+#	This file is part of pyglmahjong.
+#
+#	pyglmahjong is free software; you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation; this program is ONLY licensed under
+#	version 3 of the License, later versions are explicitly excluded.
+#
+#	pyglmahjong is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with pyglmahjong; if not, write to the Free Software
+#	Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+#	Johannes Bauer <JohannesBauer@gmx.de>
+
+import os
+import sys
+
+class Configuration(object):
+	def __init__(self, args):
+		self._args = args
+
+	@property
+	def datadir(self):
+		if self._args.datadir is None:
+			executable_dir = os.path.dirname(os.path.realpath(sys.argv[0])) + "/"
+			return executable_dir + "data/"
+		else:
+			return self._args.datadir
+
+	@property
+	def layout(self):
+		if self._args.layout is not None:
+			return self._args.layout
+		else:
+			return {
+				"mahjong":	"easy",
+				"shisen":	"14x6",
+			}[self._args.game]
+
+	@property
+	def texpath(self):
+		return self.datadir + "textures/"
+
+	@property
+	def tilesetfile(self):
+		return self.datadir + "tileset/" + self._args.tileset + ".xml"
+
+	@property
+	def layoutfile(self):
+		return self.datadir + "layout/" + self._args.game + "/" + self.layout + ".xml"
+
+	def __getattr__(self, name):
+		return getattr(self._args, name)
@@ -0,0 +1,173 @@
+#!/usr/bin/python3
+#
+#	pyglmahjong - Python OpenGL Mahjong and Shisen implementation
+#	Copyright (C) 2015-2018 Johannes Bauer
+#
+#	This file is part of pyglmahjong.
+#
+#	pyglmahjong is free software; you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation; this program is ONLY licensed under
+#	version 3 of the License, later versions are explicitly excluded.
+#
+#	pyglmahjong is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with pyglmahjong; if not, write to the Free Software
+#	Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+#	Johannes Bauer <JohannesBauer@gmx.de>
+
+import math
+import time
+import random
+import collections
+
+from Backtracking import BacktrackingSolver
+
+DifficultyReport = collections.namedtuple("DifficultyReport", [ "solutions", "exact", "success_rate", "branching", "deadends", "score", "probes", "nodes", "elapsed" ])
+
+class _NodeLimitReached(Exception):
+	pass
+
+class DifficultyEstimator(object):
+	"""Rates how hard a board is by counting its solutions, i.e. the number
+	of distinct move sequences that clear it, and the probability that
+	uniformly random play clears it. Both are counted on all valid moves,
+	without the pruning of the solver's move generator.
+
+	Positions are memoised by their backtrack_hash(), so that every
+	position is counted only once. If the whole tree can be counted within
+	the node limit, the result is exact. Otherwise, both numbers are
+	estimated with Knuth's estimator: random probes are played from the
+	start and, once no more than endgame pieces remain, the exact count of
+	the reached position is weighted with the product of the branching
+	factors along the probe. The probes also collect the mean branching
+	factor and the share of moves that lead into a position without any
+	move left, for every depth.
+
+	The score is -log10 of the success rate of random play, plus the mean
+	over all depths of the inverse branching factor, weighted by
+	NARROWNESS_WEIGHT, since boards that leave few choices are harder to
+	read for human players. If no probe succeeded, a success rate of half a
+	probe is assumed; boards proven to have no solution get an infinite
+	score.
+
+	An estimate is never below what a known solution proves: at least one
+	solution, and at least the probability that random play makes exactly
+	its moves. Unless a solution is passed to analyze(), the solver looks
+	for one within solvelimit nodes when no probe succeeded."""
+
+	NARROWNESS_WEIGHT = 5
+
+	def __init__(self, probes = 256, endgame = 16, nodelimit = 5000, solvelimit = 200000, seed = None):
+		self._probes = probes
+		self._endgame = endgame
+		self._nodelimit = nodelimit
+		self._solvelimit = solvelimit
+		self._random = random.Random(seed)
+
+	def _count(self, state, memo, budget):
+		"""Returns (solutions, success_rate) of the state, memoised. budget is
+		a list of the number of nodes used and the number of nodes at which
+		counting is abandoned."""
+		if state.backtrack_condition_satisfied():
+			return (1, 1)
+		key = state.backtrack_hash()
+		if key in memo:
+			return memo[key]
+		if budget[0] >= budget[1]:
+			raise _NodeLimitReached()
+		budget[0] += 1
+
+		(solutions, rate) = (0, 0)
+		choices = list(state.backtrack_allchoices())
+		for choice in choices:
+			state.backtrack_makechoice(choice)
+			(childsolutions, childrate) = self._count(state, memo, budget)
+			state.backtrack_reversechoice(choice)
+			solutions += childsolutions
+			rate += childrate
+		if len(choices) > 0:
+			rate /= len(choices)
+		memo[key] = (solutions, rate)
+		return (solutions, rate)
+
+	def analyze(self, board, solution = None):
+		"""Returns a DifficultyReport of the board. solution is an optional
+		list of moves that clears it."""
+		t0 = time.time()
+		engine = board.backtrack_engine()
+		memo = { }
+		budget = [ 0, self._nodelimit ]
+
+		try:
+			(solutions, rate) = self._count(engine.backtrack_clone(), memo, budget)
+			exact = True
+		except _NodeLimitReached:
+			(solutions, rate) = (0, 0)
+			exact = False
+
+		# Per depth: sum of branching factors, dead end moves and probes
+		branching = collections.Counter()
+		deadends = collections.Counter()
+		reached = collections.Counter()
+		for probe in range(self._probes):
+			state = engine.backtrack_clone()
+			(weight, counted, attempted, depth) = (1, exact, exact, 0)
+			while not state.backtrack_condition_satisfied():
+				if (not attempted) and (state.piececnt <= self._endgame):
+					# Count the endgame exactly; if that is too expensive, the
+					# probe just goes on as usual and is accounted for when it
+					# ends
+					attempted = True
+					budget[1] = budget[0] + self._nodelimit
+					try:
+						(endsolutions, endrate) = self._count(state.backtrack_clone(), memo, budget)
+						solutions += weight * endsolutions
+						rate += endrate
+						counted = True
+					except _NodeLimitReached:
+						pass
+				choices = list(state.backtrack_allchoices())
+				reached[depth] += 1
+				branching[depth] += len(choices)
+				if len(choices) == 0:
+					if depth > 0:
+						deadends[depth - 1] += 1
+					break
+				state.backtrack_makechoice(self._random.choice(choices))
+				weight *= len(choices)
+				depth += 1
+			else:
+				if not counted:
+					solutions += weight
+					rate += 1
+
+		if not exact:
+			(solutions, rate) = (solutions / self._probes, rate / self._probes)
+			if (solutions == 0) and (solution is None):
+				result = BacktrackingSolver(board).run(nodelimit = self._solvelimit)
+				budget[0] += result.nodes
+				exact = result.status == "unsolvable"
+				solution = result.moves
+			if solution is not None:
+				state = board.backtrack_clone()
+				pathrate = 1
+				for move in solution:
+					pathrate /= state.possible_movecnt()
+					state.remove_piece(*move)
+				(solutions, rate) = (max(solutions, 1), max(rate, pathrate))
+
+		depths = sorted(reached)
+		branching = tuple(branching[depth] / reached[depth] for depth in depths)
+		deadends = tuple(deadends[depth] / reached[depth] for depth in depths)
+		if exact and (solutions == 0):
+			score = math.inf
+		else:
+			narrowness = sum(1 / factor for factor in branching if (factor > 0)) / len(branching) if (len(branching) > 0) else 0
+			score = -math.log10(max(rate, 1 / (2 * self._probes))) + self.NARROWNESS_WEIGHT * narrowness
+		return DifficultyReport(solutions = solutions, exact = exact, success_rate = rate, branching = branching, deadends = deadends, score = score, probes = self._probes, nodes = budget[0], elapsed = time.time() - t0)
@@ -24,9 +24,26 @@
 import collections
 import itertools
 import random
+import queue
+import multiprocessing
 
 from TileSet import Tile
 from Piece import Piece
+from SeedDatabase import SeedDatabase
+from ReverseGenerator import ReverseGenerator
+from SeedPipeline import SeedPipeline
+from HintEngine import HintEngine
+
+_worker_game = None
+_worker_pipeline = None
+
+def _init_worker(layout, tileset, board, stages):
+	global _worker_game, _worker_pipeline
+	_worker_game = Game(None, layout, tileset, board)
+	_worker_pipeline = SeedPipeline.parse(stages)
+
+def _check_seed(seed):
+	return (seed, _worker_pipeline.check(_worker_game.deal(seed)))
 
 class Game(object):
 	def __init__(self, config, layout, tileset, board):
@@ -37,6 +54,8 @@ class Game(object):
 		self._board = board
 		self._spacing = 1.02
 		self._selected_piece = None
+		self._pipeline = None
+		self._hints = HintEngine()
 
 	def gettexturefile(self, texname):
 		return self._tileset.gettexturefile(self._config.texpath, self._config.texresolution, texname)
@@ -68,46 +87,104 @@ class Game(object):
 		tiles = list(tsiter.getrandtiles(seed))
 		self._set_layout(gridpieces, tiles)
 
-	def _set_random_layout(self):
-		seed = random.randrange(2 ** 32)
+	def _set_generated_layout(self, seed):
+		generator = ReverseGenerator(self._layout, self._tileset, ReverseGenerator.PRESETS[self._config.difficulty])
+		(gridpieces, tiles, order) = generator.generate(seed)
+		self._set_layout(gridpieces, tiles)
+
+	def deal(self, seed):
+		"""Deals the board for the given seed without any solvability check
+		and returns it."""
 		self._set_seeded_layout(seed)
-		return seed
+		return self._board
+
+	def _draw_known_seed(self):
+		if self._config.seeddb is None:
+			return None
+		seeddb = SeedDatabase(self._config.seeddb)
+		try:
+			return seeddb.random_seed(self._layout, self._tileset)
+		finally:
+			seeddb.close()
+
+	@staticmethod
+	def _random_seeds():
+		while True:
+			yield random.randrange(2 ** 32)
+
+	@staticmethod
+	def _describe_result(result):
+		if result.stage is None:
+			return result.status
+		elif result.stage == "structural":
+			return "%s by %s check, %s" % (result.status, result.stage, result.detail.description)
+		else:
+			return "%s by %s" % (result.status, result.stage)
+
+	def _find_random_seed(self):
+		for (tries, (seed, result)) in enumerate(self._pipeline.screen(self._random_seeds(), self.deal), 1):
+			print("Try #%d seed %d: %s" % (tries, seed, self._describe_result(result)))
+			if self._config.allow_unsolvable or (result.status == "solved"):
+				return (seed, result)
+
+	def _find_random_seed_speculatively(self, inflight):
+		"""Checks up to inflight random seeds at the same time in worker
+		processes. The first seed the seed pipeline finds solvable wins; only
+		the seed is taken from the worker, the board itself is dealt from it
+		in this process exactly like with a given seed."""
+		board = self._board.backtrack_clone()
+		board.clear()
+		tries = 0
+		finished = queue.Queue()
+		seeds = self._random_seeds()
+		with multiprocessing.Pool(processes = inflight, initializer = _init_worker, initargs = (self._layout, self._tileset, board, str(self._pipeline))) as pool:
+			for i in range(inflight):
+				pool.apply_async(_check_seed, (next(seeds), ), callback = finished.put, error_callback = finished.put)
+			while True:
+				outcome = finished.get()
+				if isinstance(outcome, BaseException):
+					raise outcome
+				(seed, result) = outcome
+				self._pipeline.account(result)
+				tries += 1
+				print("Try #%d seed %d: %s" % (tries, seed, self._describe_result(result)))
+				if result.status == "solved":
+					self._set_seeded_layout(seed)
+					return (seed, result)
+				pool.apply_async(_check_seed, (next(seeds), ), callback = finished.put, error_callback = finished.put)
 
 	def new(self):
 		if (len(self._layout) % 2) == 0:
-			if self._config.seed is None:
-				tries = 0
-				while True:
-					tries += 1
-					seed = self._set_random_layout()
-					print("Try #%d seed %d" % (tries, seed))
-					naively_solvable = self._board.naively_solvable()
-					if self._config.allow_unsolvable or naively_solvable:
-						break
+			if self._config.generator == "reverse":
+				# Solvable by construction, no check required
+				seed = self._config.seed if (self._config.seed is not None) else random.randrange(2 ** 32)
+				self._set_generated_layout(seed)
+				solvability = "solvable by construction, %s" % (self._config.difficulty)
+			elif self._config.seed is None:
+				seed = self._draw_known_seed()
+				if seed is not None:
+					self._set_seeded_layout(seed)
+					solvability = "verified solvable"
+				else:
+					self._pipeline = SeedPipeline.parse(self._config.stages)
+					if self._config.allow_unsolvable or (self._config.inflight <= 1):
+						(seed, result) = self._find_random_seed()
+					else:
+						(seed, result) = self._find_random_seed_speculatively(self._config.inflight)
+					print(self._pipeline.format_statistics())
+					solvability = self._describe_result(result)
 			else:
 				seed = self._config.seed
-				self._set_seeded_layout(seed)
-				naively_solvable = self._board.naively_solvable()
-			print("Game started, possible moves: %d (naively solvable %s)" % (self._board.possible_movecnt(), naively_solvable))
+				self._pipeline = SeedPipeline.parse(self._config.stages)
+				solvability = self._describe_result(self._pipeline.check(self.deal(seed)))
+			print("Game started, possible moves: %d (%s)" % (self._board.possible_movecnt(), solvability))
 			print("Seed: %d" % (seed))
+			self._hints.clear()
+			self._hints.restart(self._board)
 		else:
 			# Never solvable!
 			self.reset()
 
-#		TODO Mahjong-spezifisch
-#		self.reset()
-#		order = [ ]
-#		while self._board.piececnt > 0:
-#			nextpcs = random.sample(self._board.nonoccludedpieces(), 2)
-#			for nextpc in nextpcs:
-#				self._board.remove_piece(nextpc)
-#			order += nextpcs
-#
-#		tsiter = self._tileset.iterator(2)
-#		tiles = list(tsiter.gettiles(len(self._layout)))
-#		for (piece, tile) in zip(order, tiles):
-#			self._board.add_piece(self._make_piece(piece.gridpiece, tile))
-
 	def _set_all_pieces_idle(self):
 		for piece in self.iterpieces():
 			piece.setstate("idle")
@@ -126,7 +203,16 @@ class Game(object):
 					self._board.remove_piece(self._selected_piece)
 					self._board.remove_piece(piece)
 					self._selected_piece = None
-					print("Remaining moves: %d" % (self._board.possible_movecnt()))
+					movecnt = self._board.possible_movecnt()
+					if self._board.piececnt == 0:
+						print("Board cleared.")
+						self._hints.stop()
+					else:
+						if movecnt == 0:
+							print("No moves left, the board is a dead end.")
+						else:
+							print("Remaining moves: %d" % (movecnt))
+						self._hints.restart(self._board)
 					if not isinstance(validmove, bool):
 						return [ self._centercoords(x, 0, y) for (x, y) in validmove ]
 			else:
@@ -139,6 +225,21 @@ class Game(object):
 			for (occltype, occludingpiece) in self._board.get_occlusions(piece):
 				occludingpiece.setstate("occludes")
 
+	def hint(self):
+		"""Highlights a move that keeps the board solvable, if the hint engine
+		already knows one."""
+		hint = self._hints.hint(self._board)
+		if hint.status == "safe":
+			self._set_all_pieces_idle()
+			self._selected_piece = None
+			for piece in hint.move:
+				piece.setstate("hint")
+		elif hint.status == "dead":
+			print("The board cannot be solved anymore.")
+		else:
+			print("No hint available yet.")
+		return hint
+
 	def iterpieces(self):
 		return self._board.iterpieces()
 
@@ -111,6 +111,9 @@ class GameController(object):
 		elif event.key == "q":
 			self._middle_mouse_actionidx = (self._middle_mouse_actionidx + 1) % len(self._MIDDLE_MOUSE_ACTIONS)
 			print("Middle mouse action: %s" % (self._MIDDLE_MOUSE_ACTIONS[self._middle_mouse_actionidx]))
+		elif event.key == "h":
+			self._game.hint()
+			self._display.mark_dirty()
 
 	def _drawPiece(self, piece):
 		if piece.state == "idle":
@@ -128,6 +131,9 @@ class GameController(object):
 		elif piece.state == "occludes":
 			ambient = (0.3, 0.1, 0.1)
 			ambient_top = ambient
+		elif piece.state == "hint":
+			ambient = (0.2, 0.3, 0.5)
+			ambient_top = ambient
 		else:
 			raise Exception("Unknown state %s!" % (piece.state))
 
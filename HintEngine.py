@@ -0,0 +1,96 @@
+#!/usr/bin/python3
+#
+#	pyglmahjong - Python OpenGL Mahjong and Shisen implementation
+#	Copyright (C) 2015-2018 Johannes Bauer
+#
+#	This file is part of pyglmahjong.
+#
+#	pyglmahjong is free software; you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation; this program is ONLY licensed under
+#	version 3 of the License, later versions are explicitly excluded.
+#
+#	pyglmahjong is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with pyglmahjong; if not, write to the Free Software
+#	Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+#	Johannes Bauer <JohannesBauer@gmx.de>
+
+import threading
+import collections
+
+from Backtracking import BacktrackingSolver
+
+Hint = collections.namedtuple("Hint", [ "status", "move" ])
+
+class HintEngine(object):
+	"""Searches for a solution of the current board in a background thread
+	while the player thinks, so that a hint can be given instantly. Every
+	call to restart() abandons the running search and starts over from the
+	given board. Results are cached by the hash of the board: a solution
+	gives a safe move, one that keeps the board solvable, for every position
+	along it, and a board proven to be unsolvable is recorded as dead. A
+	search gives up after nodelimit nodes, so that it does not compete with
+	the user interface for the rest of a hard game."""
+
+	def __init__(self, nodelimit = 100000):
+		self._nodelimit = nodelimit
+		self._cache = { }
+		self._lock = threading.Lock()
+		self._cancel = None
+		self._thread = None
+
+	def clear(self):
+		"""Abandons the running search and forgets all cached results, e.g.
+		when a new game is started."""
+		self.stop()
+		with self._lock:
+			self._cache = { }
+
+	def stop(self):
+		if self._cancel is not None:
+			self._cancel.set()
+			self._cancel = None
+
+	def restart(self, board):
+		"""Starts searching from the given board unless its result is already
+		known. The search works on a copy, the board may be changed
+		immediately afterwards."""
+		self.stop()
+		with self._lock:
+			if board.backtrack_hash() in self._cache:
+				return
+		self._cancel = threading.Event()
+		self._thread = threading.Thread(target = self._search, args = (board.backtrack_clone(), self._cancel), daemon = True)
+		self._thread.start()
+
+	def _search(self, board, cancel):
+		result = BacktrackingSolver(board).run(nodelimit = self._nodelimit, cancel = cancel)
+		hints = { }
+		if result.status == "unsolvable":
+			hints[board.backtrack_hash()] = Hint(status = "dead", move = None)
+		elif result.status == "solved":
+			# Every position along the solution is known to be solvable
+			for move in result.moves:
+				hints[board.backtrack_hash()] = Hint(status = "safe", move = move)
+				board.remove_piece(*move)
+		with self._lock:
+			# The hash only depends on which positions are occupied, results of
+			# an abandoned search may belong to a different deal
+			if not cancel.is_set():
+				self._cache.update(hints)
+
+	def hint(self, board):
+		"""Returns the Hint for the given board without waiting: its status is
+		"safe" along with a move that keeps the board solvable, "dead" if the
+		board cannot be solved anymore or "pending" if the search has not
+		finished (or gave up)."""
+		if (board.piececnt > 0) and (board.possible_movecnt() == 0):
+			return Hint(status = "dead", move = None)
+		with self._lock:
+			return self._cache.get(board.backtrack_hash(), Hint(status = "pending", move = None))
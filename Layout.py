@@ -22,13 +22,18 @@
 #	Johannes Bauer <JohannesBauer@gmx.de>
 
 import collections
+import hashlib
 
 from XMLParser import XMLParser
+from OcclusionGraph import OcclusionGraph
 
 GridPiece = collections.namedtuple("GridPiece", [ "dx", "dy", "dz" ])
 
 class Layout(object):
 	def __init__(self, filename):
+		self._filename = filename
+		with open(filename, "rb") as f:
+			self._contenthash = hashlib.sha256(f.read()).hexdigest()
 		xml = XMLParser().parsefile(filename)
 		self._name = xml["name"]
 		self._gridlen = int(xml["grid"])
@@ -39,6 +44,15 @@ class Layout(object):
 				raise Exception("Coordinates in layout (%d, %d, %d) are smaller than zero." % (x, y, z))
 			self._pieces.append(GridPiece(dx = x, dy = y, dz = z))
 		self._pieces.sort(key = lambda tile: (tile.dx, tile.dz, tile.dy))
+		self._occlusion_graph = None
+
+	@property
+	def filename(self):
+		return self._filename
+
+	@property
+	def contenthash(self):
+		return self._contenthash
 
 	@property
 	def name(self):
@@ -61,6 +75,11 @@ class Layout(object):
 	def iterpieces(self):
 		return iter(self._pieces)
 
+	def occlusion_graph(self):
+		if self._occlusion_graph is None:
+			self._occlusion_graph = OcclusionGraph(self.gridlen, self.iterpieces())
+		return self._occlusion_graph
+
 	def __len__(self):
 		return len(self._pieces)
 
@@ -0,0 +1,151 @@
+#!/usr/bin/python3
+#
+#	pyglmahjong - Python OpenGL Mahjong and Shisen implementation
+#	Copyright (C) 2015-2018 Johannes Bauer
+#
+#	This file is part of pyglmahjong.
+#
+#	pyglmahjong is free software; you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation; this program is ONLY licensed under
+#	version 3 of the License, later versions are explicitly excluded.
+#
+#	pyglmahjong is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with pyglmahjong; if not, write to the Free Software
+#	Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+#	Johannes Bauer <JohannesBauer@gmx.de>
+
+import copy
+import itertools
+
+from Backtracking import BacktrackingSolvable
+from Zobrist import ZobristKeys
+
+class MahjongBitboard(BacktrackingSolvable):
+	"""Compact solver-side representation of a Mahjong board. Occupancy and
+	the set of free (i.e., non-occluded) pieces are both kept as integer
+	bitsets over the slots of the layout's occlusion graph, so that cloning
+	a state and undoing a choice are O(1). Choices are pairs of slot
+	indices.
+
+	The engine does not branch when all remaining copies of a tile are
+	free, but only offers a single pair of them."""
+	_ZOBRIST = ZobristKeys()
+
+	def __init__(self, graph, tileids):
+		assert(len(tileids) == len(graph))
+		self._masks = graph.blockermasks()
+		self._neighbours = graph.neighbours
+		self._tileids = tuple(tileids)
+		tilemasks = { }
+		self._occupied = 0
+		for (slot, tileid) in enumerate(self._tileids):
+			if tileid is not None:
+				self._occupied |= 1 << slot
+				tilemasks[tileid] = tilemasks.get(tileid, 0) | (1 << slot)
+		self._tilemasks = tuple(tilemasks.values())
+		self._zobrist = [ self._ZOBRIST[slot] for slot in range(len(self._tileids)) ]
+		self._hash = self._ZOBRIST.hash(self._iterslots(self._occupied))
+		self._free = 0
+		for slot in self._iterslots(self._occupied):
+			if self._slot_free(slot, self._occupied):
+				self._free |= 1 << slot
+		self._history = [ ]
+		self._pruned = 0
+
+	@staticmethod
+	def _iterslots(mask):
+		while mask:
+			lowbit = mask & -mask
+			yield lowbit.bit_length() - 1
+			mask ^= lowbit
+
+	def _slot_free(self, slot, occupied):
+		if occupied & self._masks.above[slot]:
+			return False
+		return not ((occupied & self._masks.left[slot]) and (occupied & self._masks.right[slot]))
+
+	@property
+	def occupied(self):
+		return self._occupied
+
+	@property
+	def free(self):
+		return self._free
+
+	@property
+	def piececnt(self):
+		return bin(self._occupied).count("1")
+
+	def tileid(self, slot):
+		return self._tileids[slot]
+
+	def backtrack_clone(self):
+		clone = copy.copy(self)
+		clone._history = list(self._history)
+		return clone
+
+	def backtrack_hash(self):
+		return self._hash
+
+	def backtrack_condition_satisfied(self):
+		return self._occupied == 0
+
+	def backtrack_pruned(self):
+		return self._pruned
+
+	def _paircnt(self):
+		paircnt = 0
+		for tilemask in self._tilemasks:
+			freecnt = bin(self._free & tilemask).count("1")
+			paircnt += freecnt * (freecnt - 1) // 2
+		return paircnt
+
+	def backtrack_choices(self):
+		(occupied, free) = (self._occupied, self._free)
+		for tilemask in self._tilemasks:
+			candidates = free & tilemask
+			if candidates and (candidates == (occupied & tilemask)):
+				# All remaining copies of this tile are free, removing any two
+				# of them is always safe and all pairings are equivalent
+				self._pruned += self._paircnt() - 1
+				lowbit = candidates & -candidates
+				candidates ^= lowbit
+				yield (lowbit.bit_length() - 1, (candidates & -candidates).bit_length() - 1)
+				return
+
+		yield from self.backtrack_allchoices()
+
+	def backtrack_allchoices(self):
+		for tilemask in self._tilemasks:
+			candidates = self._free & tilemask
+			if candidates & (candidates - 1):
+				yield from itertools.combinations(self._iterslots(candidates), 2)
+
+	def backtrack_makechoice(self, choice):
+		(slot1, slot2) = choice
+		self._history.append((self._occupied, self._free, self._hash))
+		removed = (1 << slot1) | (1 << slot2)
+		occupied = self._occupied & ~removed
+		free = self._free & ~removed
+		for slot in set(self._neighbours[slot1] + self._neighbours[slot2]):
+			if (occupied >> slot) & 1:
+				if self._slot_free(slot, occupied):
+					free |= 1 << slot
+				else:
+					free &= ~(1 << slot)
+		self._occupied = occupied
+		self._free = free
+		self._hash ^= self._zobrist[slot1] ^ self._zobrist[slot2]
+
+	def backtrack_reversechoice(self, choice):
+		(self._occupied, self._free, self._hash) = self._history.pop()
+
+	def __str__(self):
+		return "MahjongBitboard<%d pcs, %d free>" % (self.piececnt, bin(self._free).count("1"))
@@ -23,128 +23,172 @@
 
 import itertools
 import collections
-import copy
 
 from AbstractBoard import AbstractBoard
 from Backtracking import BacktrackingSolvable, BacktrackingSolver
+from ParallelBacktracking import ParallelBacktrackingSolver
+from MahjongBitboard import MahjongBitboard
+from StructuralAnalyzer import StructuralAnalyzer
+from Zobrist import ZobristKeys
 
 class MahjongBoard(AbstractBoard, BacktrackingSolvable):
-	def __init__(self, gridlen):
+	_ZOBRIST = ZobristKeys()
+
+	def __init__(self, layout):
 		AbstractBoard.__init__(self)
 		BacktrackingSolvable.__init__(self)
-		self._piecedict = collections.defaultdict(lambda: collections.defaultdict(dict))
+		self._layout = layout
+		self._gridlen = layout.gridlen
+		self._graph = layout.occlusion_graph()
+		self._slots = [ None ] * len(self._graph)
+		self._free = { }
 		self._piececnt = 0
-		self._gridlen = gridlen
+		self._hash = 0
+		self._analyzer = None
 
 	@property
 	def piececnt(self):
 		return self._piececnt
 
+	@property
+	def occlusion_graph(self):
+		return self._graph
+
 	def backtrack_clone(self):
-		clone = MahjongBoard(self._gridlen)
+		clone = MahjongBoard(self._layout)
 		clone._piececnt = self._piececnt
-		clone._piecedict = copy.deepcopy(self._piecedict)
+		clone._slots = list(self._slots)
+		clone._free = { tileid: dict(pieces) for (tileid, pieces) in self._free.items() }
+		clone._hash = self._hash
+		clone._analyzer = self._analyzer
 		return clone
 
+	def backtrack_hash(self):
+		return self._hash
+
 	def backtrack_condition_satisfied(self):
 		return self._piececnt == 0
 
-	def backtrack_choices(self):
-		yield from self.possible_moves()
+	def structural_deadlock(self):
+		if self._analyzer is None:
+			self._analyzer = StructuralAnalyzer(self._graph)
+		return self._analyzer.analyze([ (piece.tileid if (piece is not None) else None) for piece in self._slots ])
 
-	def backtrack_makechoice(self, choice):
-		(piece1, piece2) = choice
-		self.remove_piece(piece1, piece2)
+	def backtrack_engine(self):
+		return MahjongBitboard(self._graph, [ (piece.tileid if (piece is not None) else None) for piece in self._slots ])
 
-	def backtrack_reversechoice(self, choice):
-		(piece1, piece2) = choice
-		self.add_piece(piece1)
-		self.add_piece(piece2)
+	def backtrack_translate(self, choice):
+		(slot1, slot2) = choice
+		return (self._slots[slot1], self._slots[slot2])
 
 	def clear(self):
 		self._piececnt = 0
-		self._piecedict = collections.defaultdict(lambda: collections.defaultdict(dict))
+		self._slots = [ None ] * len(self._graph)
+		self._free = { }
+		self._hash = 0
+
+	def _getslot(self, piece):
+		slot = self._graph.getslot(piece.dx, piece.dy, piece.dz)
+		if slot is None:
+			raise Exception("Piece %s is not part of layout %s." % (piece, self._layout))
+		return slot
 
 	def getpiece(self, dx, dy, dz):
-		return self._piecedict[dx][dz].get(dy)
+		slot = self._graph.getslot(dx, dy, dz)
+		if slot is not None:
+			return self._slots[slot]
+
+	def _setfree(self, slot, piece, free):
+		pieces = self._free.get(piece.tileid)
+		if free:
+			if pieces is None:
+				pieces = { }
+				self._free[piece.tileid] = pieces
+			pieces[slot] = piece
+		elif pieces is not None:
+			pieces.pop(slot, None)
+
+	def _update_neighbours(self, slot):
+		for other in self._graph.neighbours[slot]:
+			piece = self._slots[other]
+			if piece is not None:
+				self._setfree(other, piece, not self._slot_occluded(other))
 
 	def add_piece(self, piece):
-		assert(self.getpiece(piece.dx, piece.dy, piece.dz) is None)
-		self._piecedict[piece.dx][piece.dz][piece.dy] = piece
+		slot = self._getslot(piece)
+		assert(self._slots[slot] is None)
+		self._slots[slot] = piece
 		self._piececnt += 1
+		self._hash ^= self._ZOBRIST[slot]
+		self._setfree(slot, piece, not self._slot_occluded(slot))
+		self._update_neighbours(slot)
 
 	def remove_piece(self, *pieces):
 		for piece in pieces:
-			assert(self.getpiece(piece.dx, piece.dy, piece.dz) is not None)
+			slot = self._getslot(piece)
+			assert(self._slots[slot] is not None)
 			self._piececnt -= 1
-			del self._piecedict[piece.dx][piece.dz][piece.dy]
+			self._slots[slot] = None
+			self._hash ^= self._ZOBRIST[slot]
+			self._setfree(slot, piece, False)
+			self._update_neighbours(slot)
+
+	def _slot_occluded(self, slot):
+		slots = self._slots
 
-	def piece_occluded(self, piece):
 		# Check if any tile on top
-		for xoffset in range(-self._gridlen + 1, self._gridlen):
-			for zoffset in range(-self._gridlen + 1, self._gridlen):
-				candidate = self.getpiece(piece.dx + xoffset, piece.dy + 1, piece.dz + zoffset)
-				if candidate is not None:
-					return True
+		for other in self._graph.above[slot]:
+			if slots[other] is not None:
+				return True
 
 		# Check if any tile left and right
-		tile_left = False
-		tile_right = False
-		for zoffset in range(-self._gridlen + 1, self._gridlen):
-			tile_left = tile_left or self.getpiece(piece.dx - self._gridlen, piece.dy, piece.dz + zoffset)
-			tile_right = tile_right or self.getpiece(piece.dx + self._gridlen, piece.dy, piece.dz + zoffset)
+		tile_left = any(slots[other] is not None for other in self._graph.left[slot])
+		tile_right = any(slots[other] is not None for other in self._graph.right[slot])
 		return (tile_left and tile_right)
 
+	def piece_occluded(self, piece):
+		return self._slot_occluded(self._getslot(piece))
+
 	def piece_selectable(self, piece):
 		return not self.piece_occluded(piece)
 
 	def get_occlusions(self, piece):
+		slot = self._getslot(piece)
 		occlusions = set()
 
 		# Check if any tile on top
-		for xoffset in range(-self._gridlen + 1, self._gridlen):
-			for zoffset in range(-self._gridlen + 1, self._gridlen):
-				candidate = self.getpiece(piece.dx + xoffset, piece.dy + 1, piece.dz + zoffset)
-				if candidate is not None:
-					occlusions.add(("top", candidate))
+		for other in self._graph.above[slot]:
+			if self._slots[other] is not None:
+				occlusions.add(("top", self._slots[other]))
 
 		# Check if any tile left and right
-		occl_left = set()
-		occl_right = set()
-		for zoffset in range(-self._gridlen + 1, self._gridlen):
-			candidate = self.getpiece(piece.dx - self._gridlen, piece.dy, piece.dz + zoffset)
-			if candidate is not None:
-				occl_left.add(("left", candidate))
-
-			candidate = self.getpiece(piece.dx + self._gridlen, piece.dy, piece.dz + zoffset)
-			if candidate is not None:
-				occl_right.add(("right", candidate))
-
+		occl_left = set(("left", self._slots[other]) for other in self._graph.left[slot] if self._slots[other] is not None)
+		occl_right = set(("right", self._slots[other]) for other in self._graph.right[slot] if self._slots[other] is not None)
 		if (len(occl_left) > 0) and (len(occl_right) > 0):
 			occlusions |= occl_left
 			occlusions |= occl_right
 		return occlusions
 
 	def possible_moves(self):
-		possible = 0
-
-		pieces_by_tileid = collections.defaultdict(list)
-		for piece in self.iterpieces():
-			pieces_by_tileid[piece.tileid].append(piece)
-
-		for identical_pieces in pieces_by_tileid.values():
-			non_occluded = [ piece for piece in identical_pieces if not self.piece_occluded(piece) ]
+		for non_occluded in [ list(pieces.values()) for pieces in self._free.values() if len(pieces) >= 2 ]:
 			for (piece1, piece2) in itertools.combinations(non_occluded, 2):
 				yield (piece1, piece2)
 
 	def nonoccludedpieces(self):
-		return [ piece for piece in self.iterpieces() if not self.piece_occluded(piece) ]
+		return [ piece for pieces in self._free.values() for piece in pieces.values() ]
+
+	def _piece_free(self, piece):
+		slot = self._graph.getslot(piece.dx, piece.dy, piece.dz)
+		return self._free.get(piece.tileid, { }).get(slot) is piece
 
-	def solve(self):
-		return BacktrackingSolver(self).solve()
+	def solve(self, processes = 1):
+		if processes == 1:
+			return BacktrackingSolver(self).solve()
+		else:
+			return ParallelBacktrackingSolver(self, processes = processes).solve()
 
 	def possible_movecnt(self):
-		return len(list(self.possible_moves()))
+		return sum(len(pieces) * (len(pieces) - 1) // 2 for pieces in self._free.values())
 
 	def dump(self):
 		for piece in self.iterpieces():
@@ -161,21 +205,20 @@ class MahjongBoard(AbstractBoard, BacktrackingSolvable):
 			print("    * [%2d %2d %2d] <-> [%2d %2d %2d]"  % (piece1.dx, piece1.dy, piece1.dz, piece2.dx, piece2.dy, piece2.dz))
 
 
+		stacks = collections.Counter((piece.dx, piece.dz) for piece in self.iterpieces())
 		for z in range(10):
 			line = ""
 			for x in range(10):
-				stapel = self._piecedict[x][z].values()
-				if len(stapel) == 0:
+				stapel = stacks[(x, z)]
+				if stapel == 0:
 					line += "  "
 				else:
-					line += " %d" % (len(stapel))
+					line += " %d" % (stapel)
 			print(line)
 
 	def valid_move(self, piece1, piece2):
-		return (piece1.tileid == piece2.tileid) and (not self.piece_occluded(piece1)) and (not self.piece_occluded(piece2))
+		return (piece1.tileid == piece2.tileid) and self._piece_free(piece1) and self._piece_free(piece2)
 
 	def iterpieces(self):
-		for zydict in list(self._piecedict.values()):
-			for ydict in list(zydict.values()):
-				yield from ydict.values()
+		return (piece for piece in list(self._slots) if piece is not None)
 
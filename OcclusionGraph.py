@@ -0,0 +1,119 @@
+#!/usr/bin/python3
+#
+#	pyglmahjong - Python OpenGL Mahjong and Shisen implementation
+#	Copyright (C) 2015-2018 Johannes Bauer
+#
+#	This file is part of pyglmahjong.
+#
+#	pyglmahjong is free software; you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation; this program is ONLY licensed under
+#	version 3 of the License, later versions are explicitly excluded.
+#
+#	pyglmahjong is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with pyglmahjong; if not, write to the Free Software
+#	Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+#	Johannes Bauer <JohannesBauer@gmx.de>
+
+import collections
+
+BlockerMasks = collections.namedtuple("BlockerMasks", [ "above", "left", "right" ])
+
+class OcclusionGraph(object):
+	"""Static neighbourhood of all grid positions of a layout. Every position
+	is identified by its slot, i.e. its index in the layout's piece list. For
+	each slot the graph knows which slots lie on top of it and which lie
+	directly left and right of it, so that checking if a piece is occluded
+	only has to look at a handful of precomputed neighbours instead of probing
+	the whole grid surrounding it."""
+
+	def __init__(self, gridlen, gridpieces):
+		self._gridlen = gridlen
+		self._gridpieces = list(gridpieces)
+		self._slots = { (gridpiece.dx, gridpiece.dy, gridpiece.dz): slot for (slot, gridpiece) in enumerate(self._gridpieces) }
+		self._above = [ ]
+		self._left = [ ]
+		self._right = [ ]
+
+		offsets = range(-gridlen + 1, gridlen)
+		for gridpiece in self._gridpieces:
+			(dx, dy, dz) = (gridpiece.dx, gridpiece.dy, gridpiece.dz)
+			self._above.append(self._lookup((dx + xoffset, dy + 1, dz + zoffset) for xoffset in offsets for zoffset in offsets))
+			self._left.append(self._lookup((dx - gridlen, dy, dz + zoffset) for zoffset in offsets))
+			self._right.append(self._lookup((dx + gridlen, dy, dz + zoffset) for zoffset in offsets))
+
+		# Slots whose occlusion state may change when a given slot is occupied
+		# or vacated: those below it and those directly left and right of it
+		below = [ [ ] for slot in range(len(self._gridpieces)) ]
+		for (slot, above) in enumerate(self._above):
+			for other in above:
+				below[other].append(slot)
+		self._below = [ tuple(slots) for slots in below ]
+		self._neighbours = [ tuple(sorted(set(self._below[slot] + self._left[slot] + self._right[slot]))) for slot in range(len(self._gridpieces)) ]
+		self._blockermasks = None
+
+	def _lookup(self, coordinates):
+		return tuple(slot for slot in (self._slots.get(coordinate) for coordinate in coordinates) if slot is not None)
+
+	@staticmethod
+	def _mask(slots):
+		return sum(1 << slot for slot in slots)
+
+	@property
+	def gridlen(self):
+		return self._gridlen
+
+	@property
+	def above(self):
+		"""For every slot, the tuple of slots that lie on top of it."""
+		return self._above
+
+	@property
+	def below(self):
+		"""For every slot, the tuple of slots that it lies on top of."""
+		return self._below
+
+	@property
+	def left(self):
+		"""For every slot, the tuple of slots that lie directly left of it."""
+		return self._left
+
+	@property
+	def right(self):
+		"""For every slot, the tuple of slots that lie directly right of it."""
+		return self._right
+
+	@property
+	def neighbours(self):
+		"""For every slot, the tuple of slots whose occlusion may change when
+		that slot is occupied or vacated."""
+		return self._neighbours
+
+	def blockermasks(self):
+		"""Returns the above, left and right neighbourhoods of all slots as
+		integer bitmasks over the slot indices."""
+		if self._blockermasks is None:
+			self._blockermasks = BlockerMasks(
+				above = [ self._mask(slots) for slots in self._above ],
+				left = [ self._mask(slots) for slots in self._left ],
+				right = [ self._mask(slots) for slots in self._right ],
+			)
+		return self._blockermasks
+
+	def getslot(self, dx, dy, dz):
+		return self._slots.get((dx, dy, dz))
+
+	def gridpiece(self, slot):
+		return self._gridpieces[slot]
+
+	def __len__(self):
+		return len(self._gridpieces)
+
+	def __str__(self):
+		return "OcclusionGraph<%d slots>" % (len(self))
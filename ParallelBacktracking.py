@@ -0,0 +1,189 @@
+#!/usr/bin/python3
+#
+#	pyglmahjong - Python OpenGL Mahjong and Shisen implementation
+#	Copyright (C) 2015-2018 Johannes Bauer
+#
+#	This file is part of pyglmahjong.
+#
+#	pyglmahjong is free software; you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation; this program is ONLY licensed under
+#	version 3 of the License, later versions are explicitly excluded.
+#
+#	pyglmahjong is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with pyglmahjong; if not, write to the Free Software
+#	Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+#	Johannes Bauer <JohannesBauer@gmx.de>
+
+import time
+import queue
+import collections
+import multiprocessing
+
+from Backtracking import BacktrackingSolvable, BacktrackingSolver, SolverResult, SolverProgress
+
+_worker_state = None
+_worker_ttsize = None
+_worker_progress = None
+
+def _init_worker(state, ttsize, progress):
+	global _worker_state, _worker_ttsize, _worker_progress
+	_worker_state = state
+	_worker_ttsize = ttsize
+	_worker_progress = progress
+
+def _solve_subtree(args):
+	(index, prefix, nodelimit, deadline, progressinterval) = args
+	state = _worker_state.backtrack_clone()
+	for choice in prefix:
+		state.backtrack_makechoice(choice)
+	if _worker_progress is not None:
+		progress = lambda report: _worker_progress.put((index, report._replace(depth = report.depth + len(prefix), maxdepth = report.maxdepth + len(prefix))))
+	else:
+		progress = None
+	result = BacktrackingSolver(state, ttsize = _worker_ttsize).run(nodelimit = nodelimit, deadline = deadline, progress = progress, progressinterval = progressinterval)
+	if result.moves is not None:
+		result = result._replace(moves = list(prefix) + result.moves)
+	return (index, result._replace(maxdepth = result.maxdepth + len(prefix)))
+
+class ParallelBacktrackingSolver(object):
+	"""Solves a BacktrackingSolvable by expanding the search tree in the
+	calling process until there are at least splitfactor subtrees per
+	process, and distributing the subtrees among a pool of worker
+	processes. As soon as any worker finds a solution, all others are
+	terminated. The result has the same format as the one of
+	BacktrackingSolver."""
+	# Interval in seconds in which the deadline and cancellation are checked
+	_POLL_INTERVAL = 0.1
+
+	def __init__(self, initialstate, processes = None, splitdepth = 4, splitfactor = 4, splitnodes = 2000, ttsize = 1000000):
+		if not isinstance(initialstate, BacktrackingSolvable):
+			raise Exception("Given state is not BacktrackingSolvable.")
+		self._initstate = initialstate
+		self._processes = processes if (processes is not None) else multiprocessing.cpu_count()
+		self._splitdepth = splitdepth
+		self._splitfactor = splitfactor
+		self._splitnodes = splitnodes
+		self._ttsize = ttsize
+
+	@staticmethod
+	def _expand(state, prefix):
+		"""Returns all prefixes that are one choice longer than the given one
+		and whether one of them already solves the board."""
+		for choice in prefix:
+			state.backtrack_makechoice(choice)
+		children = [ ]
+		solution = None
+		for choice in list(state.backtrack_choices()):
+			state.backtrack_makechoice(choice)
+			children.append((prefix + (choice, ), state.backtrack_hash()))
+			if state.backtrack_condition_satisfied():
+				solution = prefix + (choice, )
+			state.backtrack_reversechoice(choice)
+		for choice in reversed(prefix):
+			state.backtrack_reversechoice(choice)
+		return (children, solution)
+
+	def _split(self, state):
+		"""Expands the tree breadth first. Positions with only a single choice
+		do not count towards splitdepth, so that forced moves cannot leave
+		the whole search to a single worker. Stops after splitnodes
+		expansions at the latest."""
+		target = self._splitfactor * self._processes
+		frontier = collections.deque([ (( ), 0) ])
+		final = [ ]
+		seen = set()
+		expanded = 0
+		while (len(frontier) > 0) and (len(frontier) + len(final) < target) and (expanded < self._splitnodes):
+			(prefix, depth) = frontier.popleft()
+			if depth >= self._splitdepth:
+				final.append((prefix, depth))
+				continue
+			(children, solution) = self._expand(state, prefix)
+			expanded += 1
+			if solution is not None:
+				return (None, solution)
+			if len(children) > 1:
+				depth += 1
+			for (child, childhash) in children:
+				# Different move orders may lead to the same position,
+				# distribute each position only once
+				if childhash is not None:
+					if childhash in seen:
+						continue
+					seen.add(childhash)
+				frontier.append((child, depth))
+		return ([ prefix for (prefix, depth) in final + list(frontier) ], None)
+
+	def _translate(self, moves):
+		return [ self._initstate.backtrack_translate(move) for move in moves ]
+
+	def solve(self):
+		return self.run().moves
+
+	def run(self, nodelimit = None, deadline = None, cancel = None, progress = None, progressinterval = 10000):
+		"""Like BacktrackingSolver.run(), but the node limit applies to each
+		subtree individually. Progress reports of the workers are summed up
+		and passed on at most once per poll interval."""
+		t0 = time.time()
+		state = self._initstate.backtrack_engine().backtrack_clone()
+		if state.backtrack_condition_satisfied():
+			return SolverResult(status = "solved", moves = [ ], nodes = 0, elapsed = 0, maxdepth = 0, pruned = 0, tthits = 0)
+
+		(frontier, solution) = self._split(state)
+		if solution is not None:
+			return SolverResult(status = "solved", moves = self._translate(solution), nodes = 0, elapsed = time.time() - t0, maxdepth = len(solution), pruned = 0, tthits = 0)
+
+		result = SolverResult(status = "unsolvable", moves = None, nodes = 0, elapsed = 0, maxdepth = max((len(prefix) for prefix in frontier), default = 0), pruned = 0, tthits = 0)
+		if len(frontier) == 0:
+			return result._replace(elapsed = time.time() - t0)
+
+		reports = multiprocessing.Queue() if (progress is not None) else None
+		# Latest progress report of every subtree still being searched
+		running = { }
+		with multiprocessing.Pool(processes = self._processes, initializer = _init_worker, initargs = (state, self._ttsize, reports)) as pool:
+			subresults = pool.imap_unordered(_solve_subtree, [ (index, prefix, nodelimit, deadline, progressinterval) for (index, prefix) in enumerate(frontier) ])
+			remaining = set(range(len(frontier)))
+			while len(remaining) > 0:
+				if reports is not None:
+					self._forward_progress(progress, reports, remaining, running, result, t0)
+				try:
+					(index, subresult) = subresults.next(timeout = self._POLL_INTERVAL)
+				except multiprocessing.TimeoutError:
+					if ((deadline is not None) and (time.time() >= deadline)) or ((cancel is not None) and cancel.is_set()):
+						result = result._replace(status = "unknown")
+						break
+					continue
+				remaining.discard(index)
+				running.pop(index, None)
+				result = result._replace(nodes = result.nodes + subresult.nodes, maxdepth = max(result.maxdepth, subresult.maxdepth), pruned = result.pruned + subresult.pruned, tthits = result.tthits + subresult.tthits)
+				if subresult.status == "solved":
+					# Leaving the context terminates all remaining workers
+					result = result._replace(status = "solved", moves = self._translate(subresult.moves))
+					break
+				elif subresult.status == "unknown":
+					result = result._replace(status = "unknown")
+		return result._replace(elapsed = time.time() - t0)
+
+	@staticmethod
+	def _forward_progress(progress, reports, remaining, running, result, t0):
+		received = False
+		while True:
+			try:
+				(index, report) = reports.get_nowait()
+			except queue.Empty:
+				break
+			if index in remaining:
+				# Reports may still arrive after their subtree has finished
+				running[index] = report
+				received = True
+		if received:
+			elapsed = time.time() - t0
+			nodes = result.nodes + sum(report.nodes for report in running.values())
+			progress(SolverProgress(nodes = nodes, nodes_per_sec = nodes / elapsed if (elapsed > 0) else 0, depth = max(report.depth for report in running.values()), maxdepth = max([ result.maxdepth ] + [ report.maxdepth for report in running.values() ]), pruned = result.pruned + sum(report.pruned for report in running.values()), tthits = result.tthits + sum(report.tthits for report in running.values())))
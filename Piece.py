@@ -37,8 +37,15 @@ class Piece(object):
 		self._gridpiece = gridpiece
 		self._state = "idle"
 
+	def __getstate__(self):
+		# The OpenGL object is tied to the displaying process and is never
+		# transferred along with the piece
+		state = dict(self.__dict__)
+		state["_globject"] = None
+		return state
+
 	def setstate(self, state):
-		assert(state in [ "idle", "selected", "occluded", "occludes" ])
+		assert(state in [ "idle", "selected", "occluded", "occludes", "hint" ])
 		self._state = state
 
 	@property
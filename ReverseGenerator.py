@@ -0,0 +1,146 @@
+#!/usr/bin/python3
+#
+#	pyglmahjong - Python OpenGL Mahjong and Shisen implementation
+#	Copyright (C) 2015-2018 Johannes Bauer
+#
+#	This file is part of pyglmahjong.
+#
+#	pyglmahjong is free software; you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation; this program is ONLY licensed under
+#	version 3 of the License, later versions are explicitly excluded.
+#
+#	pyglmahjong is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with pyglmahjong; if not, write to the Free Software
+#	Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+#	Johannes Bauer <JohannesBauer@gmx.de>
+
+import collections
+
+from PRNG import PRNG
+from MahjongBitboard import MahjongBitboard
+
+GeneratorParameters = collections.namedtuple("GeneratorParameters", [ "spread", "pair_gap", "stack_same" ])
+
+class ReverseGenerator(object):
+	"""Generates Mahjong boards that are solvable by construction. Starting
+	with a completely filled layout, pairs of free pieces are removed until
+	the board is empty; tile pairs are then assigned to the positions in
+	the order in which they were removed, so that this order is a solution.
+
+	Boards built naively like this tend to be trivial to solve, which the
+	parameters counteract:
+
+	spread: Probability in [0, 1] that the second piece of a pair is chosen
+	far away from the first one instead of at random.
+	pair_gap: Minimum number of pairs between the two pairs of the same
+	tile, so that copies of a tile do not all become available at once.
+	stack_same: If True, a pair is preferably placed directly on top of a
+	copy of the same tile, so that greedily matching visible copies leads
+	into dead ends. If False, such placements are avoided."""
+
+	PRESETS = {
+		"easy":		GeneratorParameters(spread = 0, pair_gap = 0, stack_same = False),
+		"medium":	GeneratorParameters(spread = 0.5, pair_gap = 8, stack_same = False),
+		"hard":		GeneratorParameters(spread = 1, pair_gap = 16, stack_same = True),
+	}
+
+	# Number of candidate tile pairs that are considered for every position
+	# when trying to satisfy pair_gap and stack_same
+	_LOOKAHEAD = 8
+
+	# Number of attempts to remove all pieces before giving up; an attempt
+	# fails when fewer than two free pieces remain
+	_MAX_ATTEMPTS = 100
+
+	def __init__(self, layout, tileset, parameters = None):
+		self._layout = layout
+		self._tileset = tileset
+		self._graph = layout.occlusion_graph()
+		self._parameters = parameters if (parameters is not None) else self.PRESETS["medium"]
+
+	@staticmethod
+	def _iterslots(mask):
+		while mask:
+			lowbit = mask & -mask
+			yield lowbit.bit_length() - 1
+			mask ^= lowbit
+
+	def _distance(self, slot1, slot2):
+		(gridpiece1, gridpiece2) = (self._graph.gridpiece(slot1), self._graph.gridpiece(slot2))
+		return abs(gridpiece1.dx - gridpiece2.dx) + abs(gridpiece1.dz - gridpiece2.dz) + abs(gridpiece1.dy - gridpiece2.dy)
+
+	def _choose(self, prng, candidates):
+		return candidates[prng.nextval() % len(candidates)]
+
+	def _removal_order(self, prng):
+		"""Returns the list of slot pairs in the order in which they are
+		played, or None if the attempt ran into a dead end."""
+		state = MahjongBitboard(self._graph, [ 0 ] * len(self._graph))
+		order = [ ]
+		while not state.backtrack_condition_satisfied():
+			free = list(self._iterslots(state.free))
+			if len(free) < 2:
+				return None
+			slot1 = self._choose(prng, free)
+			free.remove(slot1)
+			if (prng.nextval() % 1000) < (self._parameters.spread * 1000):
+				candidates = [ self._choose(prng, free) for i in range(3) ]
+				slot2 = max(candidates, key = lambda slot: self._distance(slot1, slot))
+			else:
+				slot2 = self._choose(prng, free)
+			order.append((slot1, slot2))
+			state.backtrack_makechoice((slot1, slot2))
+		return order
+
+	def _stacked_on_same(self, tiles, slots, tileid):
+		return any((tiles[other] is not None) and (tiles[other].tileid == tileid) for slot in slots for other in self._graph.below[slot])
+
+	def _assign_tiles(self, prng, order):
+		pairs = list(self._tileset.iterator(len(self._layout)).getpairs())
+		prng.shuffle(pairs)
+
+		# Pieces are assigned from the bottom up, i.e., in reverse playing
+		# order, so the pieces below the current pair are already known
+		tiles = [ None ] * len(self._graph)
+		last_step = { }
+		for (step, slots) in enumerate(reversed(order)):
+			def acceptable(pair):
+				tileid = pair[0].tileid
+				if (tileid in last_step) and ((step - last_step[tileid]) <= self._parameters.pair_gap):
+					return False
+				return self._stacked_on_same(tiles, slots, tileid) == self._parameters.stack_same
+
+			for index in range(min(self._LOOKAHEAD, len(pairs))):
+				if acceptable(pairs[index]):
+					break
+			else:
+				index = 0
+			pair = pairs.pop(index)
+			last_step[pair[0].tileid] = step
+			for (slot, tile) in zip(slots, pair):
+				tiles[slot] = tile
+		return tiles
+
+	def generate(self, seed):
+		"""Returns the list of grid pieces and the list of tiles placed on
+		them for the given seed, along with the removal order that solves
+		the board as a list of slot pairs."""
+		if (len(self._layout) % 2) != 0:
+			raise Exception("Layout %s has an odd number of pieces." % (self._layout))
+		prng = PRNG(seed)
+		for attempt in range(self._MAX_ATTEMPTS):
+			order = self._removal_order(prng)
+			if order is not None:
+				break
+		else:
+			raise Exception("Could not find a removal order for %s after %d attempts." % (self._layout, self._MAX_ATTEMPTS))
+		tiles = self._assign_tiles(prng, order)
+		gridpieces = [ self._graph.gridpiece(slot) for slot in range(len(self._graph)) ]
+		return (gridpieces, tiles, order)
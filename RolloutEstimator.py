@@ -0,0 +1,131 @@
+#!/usr/bin/python3
+#
+#	pyglmahjong - Python OpenGL Mahjong and Shisen implementation
+#	Copyright (C) 2015-2018 Johannes Bauer
+#
+#	This file is part of pyglmahjong.
+#
+#	pyglmahjong is free software; you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation; this program is ONLY licensed under
+#	version 3 of the License, later versions are explicitly excluded.
+#
+#	pyglmahjong is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with pyglmahjong; if not, write to the Free Software
+#	Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+#	Johannes Bauer <JohannesBauer@gmx.de>
+
+import math
+import collections
+import numpy
+
+RolloutEstimate = collections.namedtuple("RolloutEstimate", [ "rollouts", "successes", "rate", "low", "high" ])
+
+class RolloutEstimator(object):
+	"""Estimates how likely a board is to be solved by playing it out many
+	times, either picking uniformly random moves ("random") or preferring
+	safe moves and pieces that block many others ("greedy"). The result is
+	the success rate along with its Wilson score confidence interval and
+	serves as a cheap pre-filter and difficulty proxy before any exhaustive
+	search.
+
+	For Mahjong boards, all rollouts are played simultaneously on a NumPy
+	occupancy matrix with one row per rollout, using the blocker structure
+	of the layout's occlusion graph. Other boards are played out one by one
+	through their naively_solvable() method."""
+
+	def __init__(self, rollouts = 256, policy = "random", confidence_z = 1.96, seed = None):
+		assert(policy in [ "random", "greedy" ])
+		if rollouts < 1:
+			raise Exception("Number of rollouts must be at least 1, not %d." % (rollouts))
+		self._rollouts = rollouts
+		self._policy = policy
+		self._z = confidence_z
+		self._rng = numpy.random.default_rng(seed)
+
+	def _interval(self, successes):
+		# Wilson score interval
+		(n, z) = (self._rollouts, self._z)
+		rate = successes / n
+		center = (rate + z * z / (2 * n)) / (1 + z * z / n)
+		halfwidth = z * math.sqrt(rate * (1 - rate) / n + z * z / (4 * n * n)) / (1 + z * z / n)
+		return RolloutEstimate(rollouts = n, successes = successes, rate = rate, low = max(0, center - halfwidth), high = min(1, center + halfwidth))
+
+	def estimate(self, board):
+		if hasattr(board, "occlusion_graph"):
+			successes = self._estimate_vectorized(board)
+		else:
+			successes = sum(1 for i in range(self._rollouts) if board.naively_solvable())
+		return self._interval(successes)
+
+	def _estimate_vectorized(self, board):
+		graph = board.occlusion_graph
+		slotcnt = len(graph)
+		(above, left, right) = (numpy.zeros((slotcnt, slotcnt), dtype = numpy.float32) for i in range(3))
+		for slot in range(slotcnt):
+			above[graph.above[slot], slot] = 1
+			left[graph.left[slot], slot] = 1
+			right[graph.right[slot], slot] = 1
+
+		# One-hot matrix mapping slots to tile indices
+		tileids = { }
+		slottiles = numpy.full(slotcnt, -1)
+		for piece in board.iterpieces():
+			slottiles[graph.getslot(piece.dx, piece.dy, piece.dz)] = tileids.setdefault(piece.tileid, len(tileids))
+		if len(tileids) == 0:
+			return self._rollouts
+		present = slottiles >= 0
+		tiles = numpy.zeros((slotcnt, len(tileids)), dtype = numpy.float32)
+		tiles[numpy.arange(slotcnt)[present], slottiles[present]] = 1
+
+		# Number of pieces each slot blocks, used by the greedy policy
+		blocking = numpy.array([ len(graph.below[slot]) + len(graph.left[slot]) + len(graph.right[slot]) for slot in range(slotcnt) ], dtype = numpy.float32)
+
+		occupied = numpy.tile(present, (self._rollouts, 1))
+		alive = numpy.ones(self._rollouts, dtype = bool)
+		rows = numpy.arange(self._rollouts)
+		while True:
+			active = alive & occupied.any(axis = 1)
+			if not active.any():
+				break
+			occ = occupied.astype(numpy.float32)
+			free = occupied & ((occ @ above) == 0) & (((occ @ left) == 0) | ((occ @ right) == 0))
+			freecnt = free.astype(numpy.float32) @ tiles
+			remaining = occ @ tiles
+			playable = freecnt >= 2
+			stuck = active & ~playable.any(axis = 1)
+			alive &= ~stuck
+			active &= ~stuck
+			if not active.any():
+				break
+
+			if self._policy == "random":
+				# Choose the tile to play weighted by its number of possible
+				# pairs, like a uniformly random choice among all possible
+				# moves, then two random free copies of it
+				weights = numpy.where(playable, freecnt * (freecnt - 1) / 2, 0)
+				tilescore = numpy.where(playable, self._rng.random(playable.shape) ** (1 / numpy.maximum(weights, 1)), -1)
+				chosen = numpy.argmax(tilescore, axis = 1)
+				slotscore = self._rng.random(free.shape)
+			else:
+				# Safe moves first, then the free piece that blocks the most
+				# other pieces, paired with its most blocking free copy
+				safe = playable & (freecnt == remaining)
+				slotplayable = free & present[None, :] & playable[:, slottiles]
+				slotscore = numpy.where(slotplayable, safe[:, slottiles] * 1000 + blocking[None, :] + self._rng.random(free.shape), -1)
+				chosen = slottiles[numpy.argmax(slotscore, axis = 1)]
+
+			candidates = free & (slottiles[None, :] == chosen[:, None])
+			slotscore = numpy.where(candidates, slotscore, -1)
+			first = numpy.argmax(slotscore, axis = 1)
+			slotscore[rows, first] = -1
+			second = numpy.argmax(slotscore, axis = 1)
+			occupied[rows[active], first[active]] = False
+			occupied[rows[active], second[active]] = False
+		return int(numpy.count_nonzero(alive))
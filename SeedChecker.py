@@ -0,0 +1,68 @@
+#!/usr/bin/python3
+#
+#	pyglmahjong - Python OpenGL Mahjong and Shisen implementation
+#	Copyright (C) 2015-2018 Johannes Bauer
+#
+#	This file is part of pyglmahjong.
+#
+#	pyglmahjong is free software; you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation; this program is ONLY licensed under
+#	version 3 of the License, later versions are explicitly excluded.
+#
+#	pyglmahjong is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with pyglmahjong; if not, write to the Free Software
+#	Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+#	Johannes Bauer <JohannesBauer@gmx.de>
+
+from Game import Game
+from MahjongBoard import MahjongBoard
+from ShisenBoard import ShisenBoard
+from SeedPipeline import SeedPipeline
+
+class SeedChecker(object):
+	"""Deals boards for given seeds exactly like the game does and checks
+	them for solvability, without requiring any display. The checks are
+	done by a SeedPipeline made up of the given stages. For Shisen, backend
+	selects the grid implementation of the ShisenBoard."""
+
+	def __init__(self, gamename, layout, tileset, nodelimit = None, timeout = None, stages = "structural,solver", backend = "grid"):
+		if gamename == "mahjong":
+			board = MahjongBoard(layout)
+		elif gamename == "shisen":
+			board = ShisenBoard(layout, backend)
+		else:
+			raise Exception(NotImplemented)
+		self._layout = layout
+		self._game = Game(None, layout, tileset, board)
+		self._pipeline = SeedPipeline.parse(stages, nodelimit = nodelimit, timeout = timeout)
+
+	@property
+	def pipeline(self):
+		return self._pipeline
+
+	def check(self, seed):
+		"""Returns the PipelineResult for the board dealt with the given
+		seed."""
+		return self._pipeline.check(self._game.deal(seed))
+
+	def verify(self, certificate):
+		"""Replays the SolutionCertificate on the board dealt with its seed.
+		Returns None if it is valid or a description of the violation."""
+		return certificate.replay(self._game.deal(certificate.seed), self._layout)
+
+	def rate(self, seed, estimator, solution = None):
+		"""Returns the DifficultyReport of the DifficultyEstimator for the
+		board dealt with the given seed, optionally along with a known
+		solution of it."""
+		return estimator.analyze(self._game.deal(seed), solution)
+
+	def screen(self, seeds):
+		"""Yields (seed, PipelineResult) for all given seeds."""
+		return self._pipeline.screen(seeds, self._game.deal)
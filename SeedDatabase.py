@@ -0,0 +1,144 @@
+#!/usr/bin/python3
+#
+#	pyglmahjong - Python OpenGL Mahjong and Shisen implementation
+#	Copyright (C) 2015-2018 Johannes Bauer
+#
+#	This file is part of pyglmahjong.
+#
+#	pyglmahjong is free software; you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation; this program is ONLY licensed under
+#	version 3 of the License, later versions are explicitly excluded.
+#
+#	pyglmahjong is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with pyglmahjong; if not, write to the Free Software
+#	Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+#	Johannes Bauer <JohannesBauer@gmx.de>
+
+import os
+import random
+import sqlite3
+
+from SolutionCertificate import SolutionCertificate
+
+class SeedDatabase(object):
+	"""On-disk collection of seeds that have been verified to be solvable.
+	Seeds are grouped by the layout and tileset they were verified with;
+	both are identified by their file name and a hash of their content, so
+	that changing either file invalidates its seeds. Within a collection,
+	seeds are densely numbered so that a random one can be drawn via the
+	primary key index without scanning the table. Seeds can carry an
+	encoded SolutionCertificate, which allows to re-verify them quickly."""
+
+	def __init__(self, filename):
+		self._db = sqlite3.connect(filename)
+		self._db.execute("""
+		CREATE TABLE IF NOT EXISTS collections (
+			collectionid INTEGER PRIMARY KEY,
+			layoutfile TEXT NOT NULL,
+			layouthash TEXT NOT NULL,
+			tilesetfile TEXT NOT NULL,
+			tilesethash TEXT NOT NULL,
+			nextseed INTEGER NOT NULL DEFAULT 0,
+			seedcnt INTEGER NOT NULL DEFAULT 0,
+			UNIQUE(layoutfile, layouthash, tilesetfile, tilesethash)
+		);
+		""")
+		self._db.execute("""
+		CREATE TABLE IF NOT EXISTS seeds (
+			collectionid INTEGER NOT NULL REFERENCES collections(collectionid),
+			idx INTEGER NOT NULL,
+			seed INTEGER NOT NULL,
+			nodes INTEGER NOT NULL,
+			elapsed REAL NOT NULL,
+			certificate BLOB,
+			PRIMARY KEY(collectionid, idx),
+			UNIQUE(collectionid, seed)
+		);
+		""")
+		columns = [ row[1] for row in self._db.execute("PRAGMA table_info(seeds);") ]
+		if "certificate" not in columns:
+			# Databases created before solution certificates were kept
+			self._db.execute("ALTER TABLE seeds ADD COLUMN certificate BLOB;")
+		if "solutionlen" in columns:
+			# Databases created when the solution length was still stored; it
+			# is always half the number of pieces of the layout
+			self._db.execute("ALTER TABLE seeds DROP COLUMN solutionlen;")
+		self._db.commit()
+
+	@staticmethod
+	def _key(layout, tileset):
+		return (os.path.basename(layout.filename), layout.contenthash, os.path.basename(tileset.filename), tileset.contenthash)
+
+	def getcollection(self, layout, tileset, create = False):
+		"""Returns the ID of the collection of seeds for the given layout and
+		tileset or None if there is none yet (and it should not be
+		created)."""
+		key = self._key(layout, tileset)
+		row = self._db.execute("SELECT collectionid FROM collections WHERE layoutfile = ? AND layouthash = ? AND tilesetfile = ? AND tilesethash = ?;", key).fetchone()
+		if row is not None:
+			return row[0]
+		elif create:
+			cursor = self._db.execute("INSERT INTO collections (layoutfile, layouthash, tilesetfile, tilesethash) VALUES (?, ?, ?, ?);", key)
+			self._db.commit()
+			return cursor.lastrowid
+
+	def nextseed(self, collectionid):
+		"""Returns the first seed that has not been examined yet."""
+		return self._db.execute("SELECT nextseed FROM collections WHERE collectionid = ?;", (collectionid, )).fetchone()[0]
+
+	def seedcnt(self, collectionid):
+		return self._db.execute("SELECT seedcnt FROM collections WHERE collectionid = ?;", (collectionid, )).fetchone()[0]
+
+	def add_seed(self, collectionid, seed, nodes, elapsed, certificate = None):
+		seedcnt = self.seedcnt(collectionid)
+		certificate = certificate.encode() if (certificate is not None) else None
+		self._db.execute("INSERT INTO seeds (collectionid, idx, seed, nodes, elapsed, certificate) VALUES (?, ?, ?, ?, ?, ?);", (collectionid, seedcnt, seed, nodes, elapsed, certificate))
+		self._db.execute("UPDATE collections SET seedcnt = ? WHERE collectionid = ?;", (seedcnt + 1, collectionid))
+
+	def set_nextseed(self, collectionid, nextseed):
+		self._db.execute("UPDATE collections SET nextseed = ? WHERE collectionid = ?;", (nextseed, collectionid))
+
+	def commit(self):
+		self._db.commit()
+
+	def random_seed(self, layout, tileset):
+		"""Returns a random verified seed for the given layout and tileset or
+		None if no such seed is known."""
+		collectionid = self.getcollection(layout, tileset)
+		if collectionid is None:
+			return None
+		seedcnt = self.seedcnt(collectionid)
+		if seedcnt == 0:
+			return None
+		return self._db.execute("SELECT seed FROM seeds WHERE collectionid = ? AND idx = ?;", (collectionid, random.randrange(seedcnt))).fetchone()[0]
+
+	def has_seed(self, collectionid, seed):
+		return self._db.execute("SELECT COUNT(*) FROM seeds WHERE collectionid = ? AND seed = ?;", (collectionid, seed)).fetchone()[0] > 0
+
+	def iterseeds(self, collectionid):
+		"""Yields (seed, nodes, elapsed, certificate) for all
+		seeds of the collection; certificate is a SolutionCertificate or
+		None if the seed has none."""
+		for (seed, nodes, elapsed, certificate) in self._db.execute("SELECT seed, nodes, elapsed, certificate FROM seeds WHERE collectionid = ? ORDER BY idx;", (collectionid, )).fetchall():
+			certificate = SolutionCertificate.decode(certificate) if (certificate is not None) else None
+			yield (seed, nodes, elapsed, certificate)
+
+	def find_collections(self, layout, tileset):
+		"""Returns the IDs of all collections for the file names of the given
+		layout and tileset, regardless of whether the files were changed
+		since."""
+		(layoutfile, layouthash, tilesetfile, tilesethash) = self._key(layout, tileset)
+		return [ row[0] for row in self._db.execute("SELECT collectionid FROM collections WHERE layoutfile = ? AND tilesetfile = ? ORDER BY collectionid;", (layoutfile, tilesetfile)) ]
+
+	def itercollections(self):
+		return iter(self._db.execute("SELECT collectionid, layoutfile, tilesetfile, nextseed, seedcnt FROM collections ORDER BY collectionid;").fetchall())
+
+	def close(self):
+		self._db.close()
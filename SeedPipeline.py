@@ -0,0 +1,197 @@
+#!/usr/bin/python3
+#
+#	pyglmahjong - Python OpenGL Mahjong and Shisen implementation
+#	Copyright (C) 2015-2018 Johannes Bauer
+#
+#	This file is part of pyglmahjong.
+#
+#	pyglmahjong is free software; you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation; this program is ONLY licensed under
+#	version 3 of the License, later versions are explicitly excluded.
+#
+#	pyglmahjong is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with pyglmahjong; if not, write to the Free Software
+#	Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+#	Johannes Bauer <JohannesBauer@gmx.de>
+
+import time
+import collections
+
+from Backtracking import BacktrackingSolver
+from RolloutEstimator import RolloutEstimator
+
+PipelineResult = collections.namedtuple("PipelineResult", [ "status", "stage", "detail", "moves", "elapsed", "trace" ])
+StageStatistics = collections.namedtuple("StageStatistics", [ "name", "checked", "solved", "unsolvable", "passed", "elapsed" ])
+
+class PipelineStage(object):
+	"""A single stage of a SeedPipeline. check() returns a tuple (status,
+	detail) in which status is "solved" or "unsolvable" if the stage could
+	decide the board and None if it is passed on to the next stage. Stages
+	must leave the board they are given unaltered."""
+	name = None
+
+	def check(self, board):
+		raise Exception(NotImplemented)
+
+	def solution(self, detail):
+		"""Returns the moves of the solution found by a check that returned
+		"solved" with the given detail, if the stage knows them."""
+		return None
+
+	def __str__(self):
+		return self.name
+
+class StructuralStage(PipelineStage):
+	name = "structural"
+
+	def __init__(self, param = None):
+		pass
+
+	def check(self, board):
+		deadlock = board.structural_deadlock()
+		return ("unsolvable" if (deadlock is not None) else None, deadlock)
+
+class PlayoutStage(PipelineStage):
+	name = "playout"
+
+	def __init__(self, attempts = None):
+		self._attempts = attempts if (attempts is not None) else 1
+
+	def check(self, board):
+		for attempt in range(self._attempts):
+			solution = board.naive_solution()
+			if solution is not None:
+				return ("solved", solution)
+		return (None, None)
+
+	def solution(self, detail):
+		return detail
+
+	def __str__(self):
+		return "%s:%d" % (self.name, self._attempts)
+
+class RolloutStage(PipelineStage):
+	name = "rollouts"
+
+	def __init__(self, rollouts = None):
+		self._rollouts = rollouts if (rollouts is not None) else 256
+		self._estimator = RolloutEstimator(rollouts = self._rollouts)
+
+	def check(self, board):
+		estimate = self._estimator.estimate(board)
+		return ("solved" if (estimate.successes > 0) else None, estimate)
+
+	def __str__(self):
+		return "%s:%d" % (self.name, self._rollouts)
+
+class SolverStage(PipelineStage):
+	name = "solver"
+
+	def __init__(self, nodelimit = None, timeout = None):
+		self._nodelimit = nodelimit
+		self._timeout = timeout
+
+	def check(self, board):
+		deadline = (time.time() + self._timeout) if (self._timeout is not None) else None
+		result = BacktrackingSolver(board).run(nodelimit = self._nodelimit, deadline = deadline)
+		return (result.status if (result.status != "unknown") else None, result)
+
+	def solution(self, detail):
+		return detail.moves
+
+	def __str__(self):
+		return self.name if (self._nodelimit is None) else "%s:%d" % (self.name, self._nodelimit)
+
+class SeedPipeline(object):
+	"""Checks boards for solvability by running them through a sequence of
+	increasingly expensive stages until one of them decides the board. A
+	board that no stage decides has status "unknown". The time spent in and
+	the outcome of every stage are accounted for, so that the stage order can
+	be tuned for a layout."""
+
+	_STAGES = { stage.name: stage for stage in (StructuralStage, PlayoutStage, RolloutStage, SolverStage) }
+
+	def __init__(self, stages):
+		self._stages = list(stages)
+		self._stats = { stage.name: [ 0, 0, 0, 0, 0 ] for stage in self._stages }
+
+	@classmethod
+	def parse(cls, spec, nodelimit = None, timeout = None):
+		"""Creates a pipeline from a comma-separated list of stage names, each
+		optionally followed by a colon and an integer parameter, such as
+		"structural,playout:4,rollouts:256,solver:100000". The parameter is
+		the number of attempts for playouts, the number of rollouts for
+		rollouts and the node limit for the solver (nodelimit if omitted),
+		which is additionally bounded by timeout seconds."""
+		stages = [ ]
+		for item in spec.split(","):
+			(name, _, param) = item.strip().partition(":")
+			if name not in cls._STAGES:
+				raise Exception("Unknown seed pipeline stage '%s', choose from %s." % (name, ", ".join(sorted(cls._STAGES))))
+			param = int(param) if (param != "") else None
+			if name == SolverStage.name:
+				stages.append(SolverStage(nodelimit = param if (param is not None) else nodelimit, timeout = timeout))
+			else:
+				stages.append(cls._STAGES[name](param))
+		return cls(stages)
+
+	@property
+	def stages(self):
+		return iter(self._stages)
+
+	def check(self, board):
+		"""Runs the board through all stages until one decides it and returns
+		a PipelineResult. For solved boards, its moves are the solution if
+		the deciding stage provides one. Its trace lists (stage name, status, elapsed) for
+		every stage that was run."""
+		trace = [ ]
+		(status, decider, detail, moves) = ("unknown", None, None, None)
+		for stage in self._stages:
+			t0 = time.time()
+			(stagestatus, stagedetail) = stage.check(board)
+			trace.append((stage.name, stagestatus, time.time() - t0))
+			if stagestatus is not None:
+				(status, decider, detail) = (stagestatus, stage.name, stagedetail)
+				if status == "solved":
+					moves = stage.solution(detail)
+				break
+		result = PipelineResult(status = status, stage = decider, detail = detail, moves = moves, elapsed = sum(elapsed for (name, stagestatus, elapsed) in trace), trace = tuple(trace))
+		self.account(result)
+		return result
+
+	def account(self, result):
+		"""Adds the trace of a result to the statistics. check() does this by
+		itself; this is for results that were obtained by another pipeline
+		instance, e.g. in a worker process."""
+		for (name, status, elapsed) in result.trace:
+			stats = self._stats[name]
+			stats[0] += 1
+			stats[{ "solved": 1, "unsolvable": 2, None: 3 }[status]] += 1
+			stats[4] += elapsed
+
+	def screen(self, seeds, deal):
+		"""Deals a board for every seed in the (possibly infinite) iterable
+		using deal(seed) and yields (seed, PipelineResult) for each of them.
+		While the consumer processes a result, the board is still dealt with
+		the seed that was yielded."""
+		for seed in seeds:
+			yield (seed, self.check(deal(seed)))
+
+	def statistics(self):
+		return [ StageStatistics(stage.name, *self._stats[stage.name]) for stage in self._stages ]
+
+	def format_statistics(self):
+		lines = [ ]
+		for stats in self.statistics():
+			lines.append("%-12s %7d checked %7d solved %7d unsolvable %7d passed %9.3f sec %8.3f ms/board" % (stats.name, stats.checked, stats.solved, stats.unsolvable, stats.passed, stats.elapsed, 1000 * stats.elapsed / stats.checked if (stats.checked > 0) else 0))
+		return "\n".join(lines)
+
+	def __str__(self):
+		return ",".join(str(stage) for stage in self._stages)
@@ -0,0 +1,227 @@
+#!/usr/bin/python3
+#
+#	pyglmahjong - Python OpenGL Mahjong and Shisen implementation
+#	Copyright (C) 2015-2018 Johannes Bauer
+#
+#	This file is part of pyglmahjong.
+#
+#	pyglmahjong is free software; you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation; this program is ONLY licensed under
+#	version 3 of the License, later versions are explicitly excluded.
+#
+#	pyglmahjong is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with pyglmahjong; if not, write to the Free Software
+#	Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+#	Johannes Bauer <JohannesBauer@gmx.de>
+
+import numpy
+
+class ShisenArrayGrid(object):
+	"""NumPy backend with the same interface as ShisenGrid, used by
+	ShisenBoard to enumerate all moves of a position in bulk. The board is
+	kept as a tile ID array padded by a vacant border of one cell, -1 for
+	vacant cells. Blocker tables and prefix sums of the occupancy are
+	computed with vectorised operations whenever the grid has changed.
+	connectable() decides arbitrarily many pairs at once: for every pair,
+	all lanes in which the middle segment could run are tested together
+	against the prefix sums. reachable() derives its mask from the blocker
+	tables. Single moves are cheaper on ShisenGrid, which is why the
+	solver always uses that."""
+
+	def __init__(self, minx, miny, maxx, maxy):
+		(self._x0, self._y0) = (minx - 1, miny - 1)
+		self._width = maxx - minx + 3
+		self._height = maxy - miny + 3
+		self.clear()
+
+	@classmethod
+	def from_layout(cls, layout):
+		gridpieces = list(layout.iterpieces())
+		return cls(min(gridpiece.dx for gridpiece in gridpieces), min(gridpiece.dz for gridpiece in gridpieces), max(gridpiece.dx for gridpiece in gridpieces), max(gridpiece.dz for gridpiece in gridpieces))
+
+	def clone(self):
+		clone = ShisenArrayGrid.__new__(ShisenArrayGrid)
+		(clone._x0, clone._y0, clone._width, clone._height) = (self._x0, self._y0, self._width, self._height)
+		clone._tileids = self._tileids.copy()
+		clone._tables = self._tables
+		return clone
+
+	def clear(self):
+		self._tileids = numpy.full((self._height, self._width), -1, dtype = numpy.int32)
+		self._tables = None
+
+	@property
+	def occupancy(self):
+		return self._tileids >= 0
+
+	def set(self, x, y, tileid):
+		(i, j) = (x - self._x0, y - self._y0)
+		assert((0 < i < self._width - 1) and (0 < j < self._height - 1))
+		self._tileids[j, i] = tileid if (tileid is not None) else -1
+		self._tables = None
+
+	def occupied(self, x, y):
+		(i, j) = (x - self._x0, y - self._y0)
+		if (0 <= i < self._width) and (0 <= j < self._height):
+			return bool(self._tileids[j, i] >= 0)
+		return False
+
+	def cell(self, x, y):
+		return (y - self._y0) * self._width + (x - self._x0)
+
+	def coordinates(self, cell):
+		return ((cell % self._width) + self._x0, (cell // self._width) + self._y0)
+
+	def _compute_tables(self):
+		"""Returns the nearest occupied row strictly above and below and the
+		nearest occupied column strictly left and right of every cell, and
+		the prefix sums of the occupancy along rows and columns."""
+		if self._tables is not None:
+			return self._tables
+		occupancy = self.occupancy
+		(h, w) = occupancy.shape
+		rows = numpy.arange(h)[:, None]
+		cols = numpy.arange(w)[None, :]
+
+		nearest = numpy.maximum.accumulate(numpy.where(occupancy, rows, -1), axis = 0)
+		up = numpy.vstack([ numpy.full((1, w), -1), nearest[:-1] ])
+		nearest = numpy.minimum.accumulate(numpy.where(occupancy, rows, h)[::-1], axis = 0)[::-1]
+		down = numpy.vstack([ nearest[1:], numpy.full((1, w), h) ])
+		nearest = numpy.maximum.accumulate(numpy.where(occupancy, cols, -1), axis = 1)
+		left = numpy.hstack([ numpy.full((h, 1), -1), nearest[:, :-1] ])
+		nearest = numpy.minimum.accumulate(numpy.where(occupancy, cols, w)[:, ::-1], axis = 1)[:, ::-1]
+		right = numpy.hstack([ nearest[:, 1:], numpy.full((h, 1), w) ])
+
+		# rowsums[j, k] is the number of occupied cells in row j left of
+		# column k, colsums[k, i] those in column i above row k
+		rowsums = numpy.hstack([ numpy.zeros((h, 1), dtype = int), numpy.cumsum(occupancy, axis = 1) ])
+		colsums = numpy.vstack([ numpy.zeros((1, w), dtype = int), numpy.cumsum(occupancy, axis = 0) ])
+		self._tables = (up, down, left, right, rowsums, colsums)
+		return self._tables
+
+	def _lanes(self, i1, j1, i2, j2):
+		"""For arrays of pairs of cells in grid coordinates, returns boolean
+		matrices that tell for every pair and every row (column) whether the
+		pair can be connected with the middle segment in that row
+		(column)."""
+		(up, down, left, right, rowsums, colsums) = self._compute_tables()
+		(h, w) = (self._height, self._width)
+
+		rowlo = numpy.maximum(up[j1, i1], up[j2, i2]) + 1
+		rowhi = numpy.minimum(down[j1, i1], down[j2, i2]) - 1
+		(imin, imax) = (numpy.minimum(i1, i2), numpy.maximum(i1, i2))
+		between = rowsums[:, imax] - rowsums[:, numpy.minimum(imin + 1, imax)]
+		rows = numpy.arange(h)[None, :]
+		rowlanes = (between.T <= 0) & (rows >= rowlo[:, None]) & (rows <= rowhi[:, None])
+
+		collo = numpy.maximum(left[j1, i1], left[j2, i2]) + 1
+		colhi = numpy.minimum(right[j1, i1], right[j2, i2]) - 1
+		(jmin, jmax) = (numpy.minimum(j1, j2), numpy.maximum(j1, j2))
+		between = colsums[jmax, :] - colsums[numpy.minimum(jmin + 1, jmax), :]
+		cols = numpy.arange(w)[None, :]
+		collanes = (between <= 0) & (cols >= collo[:, None]) & (cols <= colhi[:, None])
+		return (rowlanes, collanes)
+
+	def _grid_coordinates(self, pairs):
+		coordinates = numpy.array(pairs, dtype = int).reshape(-1, 4)
+		return (coordinates[:, 0] - self._x0, coordinates[:, 1] - self._y0, coordinates[:, 2] - self._x0, coordinates[:, 3] - self._y0)
+
+	def connectable(self, pairs):
+		"""Takes a sequence of ((x1, y1), (x2, y2)) cell pairs and returns a
+		boolean array that tells for each of them whether it can be
+		connected, all evaluated at once."""
+		if len(pairs) == 0:
+			return numpy.zeros(0, dtype = bool)
+		(rowlanes, collanes) = self._lanes(*self._grid_coordinates(pairs))
+		return rowlanes.any(axis = 1) | collanes.any(axis = 1)
+
+	def segment_clear(self, x1, y1, x2, y2):
+		if (x1, y1) == (x2, y2):
+			return True
+		(i1, j1, i2, j2) = (x1 - self._x0, y1 - self._y0, x2 - self._x0, y2 - self._y0)
+		occupancy = self.occupancy
+		if j1 == j2:
+			segment = occupancy[j1, min(i1, i2) : max(i1, i2) + 1]
+		else:
+			segment = occupancy[min(j1, j2) : max(j1, j2) + 1, i1]
+		# The start cell does not count
+		return int(segment.sum()) - int(occupancy[j1, i1]) == 0
+
+	@staticmethod
+	def _points(*points):
+		path = [ points[0] ]
+		for point in points[1:]:
+			if point != path[-1]:
+				path.append(point)
+		return path
+
+	def connect(self, x1, y1, x2, y2):
+		"""Returns the corner points of a path with at most two turns between
+		the cells, preferring the same lanes as ShisenGrid, or None."""
+		(rowlanes, collanes) = self._lanes(*self._grid_coordinates([ ((x1, y1), (x2, y2)) ]))
+		(rowlanes, collanes) = (rowlanes[0], collanes[0])
+		(i1, j1, i2, j2) = (x1 - self._x0, y1 - self._y0, x2 - self._x0, y2 - self._y0)
+		def rowpath(j):
+			return self._points((x1, y1), (x1, j + self._y0), (x2, j + self._y0), (x2, y2))
+		def colpath(i):
+			return self._points((x1, y1), (i + self._x0, y1), (i + self._x0, y2), (x2, y2))
+
+		for j in (j1, j2):
+			if rowlanes[j]:
+				return rowpath(j)
+		for i in (i1, i2):
+			if collanes[i]:
+				return colpath(i)
+		rows = numpy.nonzero(rowlanes)[0]
+		if len(rows) > 0:
+			return rowpath(int(min(rows, key = lambda j: abs(j - j1) + abs(j - j2))))
+		cols = numpy.nonzero(collanes)[0]
+		if len(cols) > 0:
+			return colpath(int(min(cols, key = lambda i: abs(i - i1) + abs(i - i2))))
+		return None
+
+	def reachable(self, x, y):
+		"""Returns the set of the indices of all occupied cells that can be
+		reached from the cell (x, y) with a path of at most two turns, like
+		ShisenGrid.reachable(). The lanes of the middle segment form a mask
+		over the grid; the ends of the last segment are the blockers of all
+		cells in the mask."""
+		(up, down, left, right, rowsums, colsums) = self._compute_tables()
+		(h, w) = (self._height, self._width)
+		(i0, j0) = (x - self._x0, y - self._y0)
+		rows = numpy.arange(h)[:, None]
+		cols = numpy.arange(w)[None, :]
+		cells = [ ]
+
+		# First segment vertical, middle segment along rows
+		run = (rows[:, 0] > up[j0, i0]) & (rows[:, 0] < down[j0, i0])
+		(lanefirst, lanelast) = (left[:, i0], right[:, i0])
+		cells += [ (rows[run, 0] * w + lanefirst[run])[lanefirst[run] >= 0], (rows[run, 0] * w + lanelast[run])[lanelast[run] < w] ]
+		mask = run[:, None] & (cols > lanefirst[:, None]) & (cols < lanelast[:, None])
+		(js, is_) = numpy.nonzero(mask)
+		cells += [ (up[js, is_] * w + is_)[up[js, is_] >= 0], (down[js, is_] * w + is_)[down[js, is_] < h] ]
+
+		# First segment horizontal, middle segment along columns
+		run = (cols[0] > left[j0, i0]) & (cols[0] < right[j0, i0])
+		(lanefirst, lanelast) = (up[j0, :], down[j0, :])
+		cells += [ (lanefirst[run] * w + cols[0, run])[lanefirst[run] >= 0], (lanelast[run] * w + cols[0, run])[lanelast[run] < h] ]
+		mask = run[None, :] & (rows > lanefirst[None, :]) & (rows < lanelast[None, :])
+		(js, is_) = numpy.nonzero(mask)
+		cells += [ (js * w + left[js, is_])[left[js, is_] >= 0], (js * w + right[js, is_])[right[js, is_] < w] ]
+		return set(numpy.concatenate(cells).tolist())
+
+	def connected_pairs(self, groups):
+		"""Same as ShisenGrid.connected_pairs(), with all pairs of all groups
+		evaluated in a single call."""
+		candidates = [ (group, index1, index2) for (group, cells) in enumerate(groups) for index1 in range(len(cells)) for index2 in range(index1 + 1, len(cells)) ]
+		connectable = self.connectable([ (groups[group][index1], groups[group][index2]) for (group, index1, index2) in candidates ])
+		for (candidate, valid) in zip(candidates, connectable):
+			if valid:
+				yield candidate
@@ -0,0 +1,243 @@
+#!/usr/bin/python3
+#
+#	pyglmahjong - Python OpenGL Mahjong and Shisen implementation
+#	Copyright (C) 2015-2018 Johannes Bauer
+#
+#	This file is part of pyglmahjong.
+#
+#	pyglmahjong is free software; you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation; this program is ONLY licensed under
+#	version 3 of the License, later versions are explicitly excluded.
+#
+#	pyglmahjong is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with pyglmahjong; if not, write to the Free Software
+#	Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+#	Johannes Bauer <JohannesBauer@gmx.de>
+
+import itertools
+
+from Backtracking import BacktrackingSolvable
+from StructuralAnalyzer import Deadlock
+from Zobrist import ZobristKeys
+
+class ShisenBitboard(BacktrackingSolvable):
+	"""Solver-side representation of a Shisen board on a private
+	ShisenGrid, choices are pairs of cell indices. The set of valid pairs
+	is kept up to date with every choice."""
+	_ZOBRIST = ZobristKeys()
+
+	# Tiles with at most this many remaining copies are checked for a
+	# perfect matching of valid pairs
+	_MATCHING_COPIES = 6
+
+	def __init__(self, grid, pieces):
+		"""Takes an empty ShisenGrid that spans the layout, which the engine
+		takes ownership of, and an iterable of (x, y, tileid) of all
+		pieces."""
+		self._grid = grid
+		self._coords = { }
+		self._tileids = { }
+		self._copies = { }
+		self._hash = 0
+		for (x, y, tileid) in pieces:
+			grid.set(x, y, tileid)
+			cell = grid.cell(x, y)
+			self._coords[cell] = (x, y)
+			self._tileids[cell] = tileid
+			self._copies.setdefault(tileid, [ ]).append(cell)
+			self._hash ^= self._ZOBRIST[(x, y)]
+		self._piececnt = len(self._coords)
+		self._pairs = self._find_pairs()
+		self._dead = any(self._crossed(tileid) for tileid in self._copies)
+		self._history = [ ]
+		self._pruned = 0
+
+	@property
+	def piececnt(self):
+		return self._piececnt
+
+	@property
+	def grid(self):
+		return self._grid
+
+	def coordinates(self, cell):
+		return self._coords[cell]
+
+	def _find_pairs(self):
+		groups = [ cells for cells in self._copies.values() if len(cells) >= 2 ]
+		pairs = set()
+		for (group, index1, index2) in self._grid.connected_pairs([ [ self._coords[cell] for cell in cells ] for cells in groups ]):
+			(cell1, cell2) = (groups[group][index1], groups[group][index2])
+			pairs.add((min(cell1, cell2), max(cell1, cell2)))
+		return pairs
+
+	def _crossed(self, tileid):
+		"""Checks if the last two copies of the tile and the last two copies
+		of another tile occupy the diagonals of a 2x2 square."""
+		copies = self._copies[tileid]
+		if len(copies) != 2:
+			return False
+		((x1, y1), (x2, y2)) = (self._coords[copies[0]], self._coords[copies[1]])
+		if (abs(x1 - x2) != 1) or (abs(y1 - y2) != 1):
+			return False
+		(corner1, corner2) = (self._grid.cell(x1, y2), self._grid.cell(x2, y1))
+		if (not self._grid.occupied(x1, y2)) or (not self._grid.occupied(x2, y1)):
+			return False
+		other = self._tileids[corner1]
+		return (other == self._tileids[corner2]) and (len(self._copies[other]) == 2)
+
+	def deadlock(self):
+		"""Returns a Deadlock if the board is unsolvable for structural
+		reasons, or None if none was found."""
+		if self._dead:
+			return Deadlock(rule = "crossed-pairs", description = "last two copies of two tiles cross each other")
+
+		grid = self._grid
+		neighbours = { }
+		for (cell, (x, y)) in self._coords.items():
+			if grid.occupied(x, y):
+				neighbours[cell] = [ grid.cell(nx, ny) for (nx, ny) in ((x - 1, y), (x + 1, y), (x, y - 1), (x, y + 1)) if grid.occupied(nx, ny) ]
+		# A piece can only be removed once a neighbour is vacant or its
+		# partner is adjacent, and only with a partner for which the same
+		# holds. Whatever is left after collecting all such pieces is boxed in.
+		removable = set()
+		def opened(cell):
+			return (len(neighbours[cell]) < 4) or any(neighbour in removable for neighbour in neighbours[cell])
+
+		changed = True
+		while changed:
+			changed = False
+			for cells in self._copies.values():
+				for cell in cells:
+					if cell in removable:
+						continue
+					adjacent = [ other for other in cells if (other != cell) and (other in neighbours[cell]) ]
+					if (len(adjacent) > 0) or (opened(cell) and any(opened(other) for other in cells if other != cell)):
+						removable.add(cell)
+						changed = True
+		if len(removable) < len(neighbours):
+			(x, y) = self._coords[min(set(neighbours) - removable)]
+			return Deadlock(rule = "boxed-in", description = "%d pieces such as the one at %d, %d are boxed in for good" % (len(neighbours) - len(removable), x, y))
+		return None
+
+	def backtrack_clone(self):
+		clone = ShisenBitboard.__new__(ShisenBitboard)
+		clone.__dict__.update(self.__dict__)
+		clone._grid = self._grid.clone()
+		clone._copies = { tileid: list(cells) for (tileid, cells) in self._copies.items() }
+		clone._history = list(self._history)
+		return clone
+
+	def backtrack_hash(self):
+		return self._hash
+
+	def backtrack_condition_satisfied(self):
+		return self._piececnt == 0
+
+	def backtrack_pruned(self):
+		return self._pruned
+
+	def _pairs_by_tile(self):
+		bytile = { }
+		for pair in self._pairs:
+			bytile.setdefault(self._tileids[pair[0]], [ ]).append(pair)
+		return bytile
+
+	@staticmethod
+	def _perfect_matching(cells, pairs):
+		"""Returns a pair of a perfect matching of the cells that only
+		consists of the given pairs, or None if there is none."""
+		first = cells[0]
+		for pair in pairs:
+			if first in pair:
+				partner = pair[1] if (pair[0] == first) else pair[0]
+				rest = [ cell for cell in cells if (cell != first) and (cell != partner) ]
+				if (len(rest) == 0) or (ShisenBitboard._perfect_matching(rest, [ other for other in pairs if (first not in other) and (partner not in other) ]) is not None):
+					return pair
+		return None
+
+	def _lanes_opened(self, pair, paired):
+		# Number of stuck pieces that see one of the pair's pieces first in
+		# some direction
+		blocked = 0
+		for cell in pair:
+			for neighbour in self._grid.blockers(*self._coords[cell]):
+				if neighbour not in paired:
+					blocked += 1
+		return blocked
+
+	def backtrack_choices(self):
+		if self._dead or (len(self._pairs) == 0):
+			return
+		# Removing pieces never blocks a path, so if the valid pairs of a tile
+		# pair up all of its copies, taking one of them is always safe
+		bytile = self._pairs_by_tile()
+		for (tileid, pairs) in bytile.items():
+			copies = self._copies[tileid]
+			if len(copies) <= self._MATCHING_COPIES:
+				pair = self._perfect_matching(copies, pairs)
+				if pair is not None:
+					self._pruned += len(self._pairs) - 1
+					yield pair
+					return
+
+		# Try pairs that block the view of stuck pieces first
+		paired = set(itertools.chain.from_iterable(self._pairs))
+		yield from sorted(self._pairs, key = lambda pair: (-self._lanes_opened(pair, paired), pair))
+
+	def backtrack_allchoices(self):
+		return sorted(self._pairs)
+
+	def backtrack_sleepset(self, sleeping, choice):
+		(cell1, cell2) = choice
+		return [ pair for pair in sleeping if (cell1 not in pair) and (cell2 not in pair) ]
+
+	def backtrack_makechoice(self, choice):
+		(cell1, cell2) = choice
+		(grid, coords, tileids) = (self._grid, self._coords, self._tileids)
+		self._history.append((self._pairs, self._dead, self._hash))
+		for cell in choice:
+			grid.set(*coords[cell], None)
+			self._hash ^= self._ZOBRIST[coords[cell]]
+		copies = self._copies[tileids[cell1]]
+		copies.remove(cell1)
+		copies.remove(cell2)
+		self._piececnt -= 2
+
+		# A pair that became valid has a path through a vacated cell
+		pairs = set(pair for pair in self._pairs if (cell1 not in pair) and (cell2 not in pair))
+		for cell in choice:
+			bytile = { }
+			for other in sorted(grid.reachable(*coords[cell])):
+				tileid = tileids[other]
+				cells = bytile.get(tileid)
+				if cells is None:
+					bytile[tileid] = [ other ]
+					continue
+				for partner in cells:
+					pair = (partner, other)
+					if (pair not in pairs) and (grid.connect(*coords[partner], *coords[other]) is not None):
+						pairs.add(pair)
+				cells.append(other)
+		self._pairs = pairs
+		if self._crossed(tileids[cell1]):
+			self._dead = True
+
+	def backtrack_reversechoice(self, choice):
+		(cell1, cell2) = choice
+		tileid = self._tileids[cell1]
+		for cell in choice:
+			self._grid.set(*self._coords[cell], tileid)
+		self._copies[tileid] += [ cell1, cell2 ]
+		self._piececnt += 2
+		(self._pairs, self._dead, self._hash) = self._history.pop()
+
+	def __str__(self):
+		return "ShisenBitboard<%d pcs, %d pairs>" % (self._piececnt, len(self._pairs))
@@ -26,62 +26,85 @@ import collections
 import random
 
 from Backtracking import BacktrackingSolvable, BacktrackingSolver
-from ShisenPath import ShisenConnection
+from ParallelBacktracking import ParallelBacktrackingSolver
+from ShisenGrid import ShisenGrid
+from ShisenArrayGrid import ShisenArrayGrid
+from ShisenBitboard import ShisenBitboard
 from AbstractBoard import AbstractBoard
+from Zobrist import ZobristKeys
 
 class ShisenBoard(AbstractBoard, BacktrackingSolvable):
-	def __init__(self):
+	_ZOBRIST = ZobristKeys()
+	_BACKENDS = {
+		"grid":		ShisenGrid,
+		"numpy":	ShisenArrayGrid,
+	}
+
+	def __init__(self, layout, backend = "grid"):
 		AbstractBoard.__init__(self)
 		BacktrackingSolvable.__init__(self)
+		if backend not in self._BACKENDS:
+			raise Exception("Unknown Shisen board backend \"%s\", choose one of %s." % (backend, ", ".join(sorted(self._BACKENDS))))
+		self._layout = layout
+		self._backend = backend
+		self._grid = self._BACKENDS[backend].from_layout(layout)
 		self._piecedict = { }
-		self._minx = 0
-		self._maxx = 0
-		self._miny = 0
-		self._maxy = 0
-
-	def _calc_minmax(self):
-		if self.piececnt == 0:
-			self._minx = 0
-			self._maxx = 0
-			self._miny = 0
-			self._maxy = 0
-		else:
-			self._minx = min(key[0] for key in self._piecedict.keys())
-			self._miny = min(key[1] for key in self._piecedict.keys())
-			self._maxx = max(key[0] for key in self._piecedict.keys())
-			self._maxy = max(key[1] for key in self._piecedict.keys())
+		self._bytile = collections.defaultdict(list)
+		self._hash = 0
 
-	def _calc_minmax_conditionally(self, piece):
-		if (piece.dx <= self._minx) or (piece.dx >= self._maxx) or (piece.dz <= self._miny) or (piece.dz >= self._maxy):
-			self._calc_minmax()
+		# All valid moves as a dict (used as an ordered set) that is never
+		# altered in place, None when it needs to be rebuilt. It is updated
+		# for the pieces in _removed the next time it is needed.
+		self._validpairs = None
+		self._removed = ( )
 
 	@property
 	def piececnt(self):
 		return len(self._piecedict)
 
+	@property
+	def backend(self):
+		return self._backend
+
+	@property
+	def grid(self):
+		return self._grid
+
 	def backtrack_clone(self):
-		clone = ShisenBoard()
+		clone = ShisenBoard(self._layout, self._backend)
+		clone._grid = self._grid.clone()
 		clone._piecedict = dict(self._piecedict)
+		clone._bytile = collections.defaultdict(list, { tileid: list(pieces) for (tileid, pieces) in self._bytile.items() })
+		clone._validpairs = self._validpairs
+		clone._removed = self._removed
+		clone._hash = self._hash
 		return clone
 
+	def backtrack_hash(self):
+		return self._hash
+
 	def backtrack_condition_satisfied(self):
 		return self.piececnt == 0
 
-	def backtrack_choices(self):
-		yield from self.possible_moves()
+	def backtrack_engine(self):
+		# The engine always runs on the bitboard grid, whose single cell
+		# updates suit make/unmake best
+		return ShisenBitboard(ShisenGrid.from_layout(self._layout), [ (piece.dx, piece.dz, piece.tileid) for piece in self._piecedict.values() ])
 
-	def backtrack_makechoice(self, choice):
-		(piece1, piece2) = choice
-		self.remove_piece(piece1)
-		self.remove_piece(piece2)
+	def backtrack_translate(self, choice):
+		(cell1, cell2) = choice
+		return (self.getpiece(*self._grid.coordinates(cell1)), self.getpiece(*self._grid.coordinates(cell2)))
 
-	def backtrack_reversechoice(self, choice):
-		(piece1, piece2) = choice
-		self.add_piece(piece1)
-		self.add_piece(piece2)
+	def structural_deadlock(self):
+		return self.backtrack_engine().deadlock()
 
 	def clear(self):
+		self._grid.clear()
 		self._piecedict = { }
+		self._bytile = collections.defaultdict(list)
+		self._hash = 0
+		self._validpairs = None
+		self._removed = ( )
 
 	def getpiece(self, dx, dy):
 		return self._piecedict.get((dx, dy))
@@ -89,47 +112,89 @@ class ShisenBoard(AbstractBoard, BacktrackingSolvable):
 	def add_piece(self, piece):
 		assert(self.getpiece(piece.dx, piece.dz) is None)
 		self._piecedict[(piece.dx, piece.dz)] = piece
-		self._calc_minmax_conditionally(piece)
+		self._grid.set(piece.dx, piece.dz, piece.tileid)
+		self._bytile[piece.tileid].append(piece)
+		self._hash ^= self._ZOBRIST[(piece.dx, piece.dz)]
+		self._validpairs = None
+		self._removed = ( )
 
 	def remove_piece(self, *pieces):
 		for piece in pieces:
 			assert(self.getpiece(piece.dx, piece.dz) is not None)
 			del self._piecedict[(piece.dx, piece.dz)]
-			self._calc_minmax_conditionally(piece)
-
-	def solve(self):
-		return BacktrackingSolver(self).solve()
+			self._grid.set(piece.dx, piece.dz, None)
+			self._bytile[piece.tileid].remove(piece)
+			self._hash ^= self._ZOBRIST[(piece.dx, piece.dz)]
+		if self._validpairs is not None:
+			self._removed += pieces
+
+	def _may_pass(self, piece1, piece2, x, y):
+		"""Quick necessary condition for a path of at most two turns between
+		the pieces to lead through the vacant cell (x, y): either piece sees
+		the cell in a straight line, or both see the cell's row (or column),
+		from where a middle segment could pass the cell."""
+		for piece in (piece1, piece2):
+			if ((piece.dx == x) or (piece.dz == y)) and self._grid.segment_clear(piece.dx, piece.dz, x, y):
+				return True
+		if self._grid.segment_clear(piece1.dx, piece1.dz, piece1.dx, y) and self._grid.segment_clear(piece2.dx, piece2.dz, piece2.dx, y):
+			return True
+		return self._grid.segment_clear(piece1.dx, piece1.dz, x, piece1.dz) and self._grid.segment_clear(piece2.dx, piece2.dz, x, piece2.dz)
+
+	def _update_validpairs(self):
+		removed = self._removed
+		validpairs = { pair: None for pair in self._validpairs if (pair[0] not in removed) and (pair[1] not in removed) }
+		for similar_pieces in self._bytile.values():
+			for (piece1, piece2) in itertools.combinations(similar_pieces, 2):
+				if ((piece1, piece2) not in validpairs) and ((piece2, piece1) not in validpairs) and any(self._may_pass(piece1, piece2, piece.dx, piece.dz) for piece in removed):
+					if self.valid_move(piece1, piece2):
+						validpairs[(piece1, piece2)] = None
+		self._validpairs = validpairs
+		self._removed = ( )
+
+	def _valid_pairs(self):
+		if self._validpairs is None:
+			self._validpairs = { pair: None for pair in self._find_moves() }
+		elif len(self._removed) > 0:
+			self._update_validpairs()
+		return self._validpairs
+
+	def solve(self, processes = 1):
+		if processes == 1:
+			return BacktrackingSolver(self).solve()
+		else:
+			return ParallelBacktrackingSolver(self, processes = processes).solve()
 
 	def iterpieces(self):
 		return iter(self._piecedict.values())
 
-	def possible_moves(self):
-		piece_by_tileid = collections.defaultdict(list)
-		for piece in self.iterpieces():
-			piece_by_tileid[piece.tileid].append(piece)
+	def _find_moves(self):
+		groups = [ pieces for pieces in self._bytile.values() if len(pieces) >= 2 ]
+		for (group, index1, index2) in self._grid.connected_pairs([ [ (piece.dx, piece.dz) for piece in pieces ] for pieces in groups ]):
+			yield (groups[group][index1], groups[group][index2])
 
-		for similar_pieces in piece_by_tileid.values():
-			for (piece1, piece2) in itertools.combinations(similar_pieces, 2):
-				if self.valid_move(piece1, piece2):
-					yield (piece1, piece2)
+	def possible_moves(self):
+		return iter(list(self._valid_pairs()))
 
 	def possible_movecnt(self):
-		return len(list(self.possible_moves()))
+		return len(self._valid_pairs())
 
 	def valid_move(self, piece1, piece2):
 		if piece1.tileid != piece2.tileid:
 			return None
 
-		# Construct paths
-		conn = ShisenConnection(piece1.dx, piece1.dz, piece2.dx, piece2.dz, self._minx, self._miny, self._maxx, self._maxy)
-		for path in conn.paths():
-			for (x, y) in path.walk():
-				if self.getpiece(x, y) is not None:
-					break
-			else:
-				return path.getpoints()
-
-		return None
+		return self._grid.connect(piece1.dx, piece1.dz, piece2.dx, piece2.dz)
+
+	def valid_moves(self, pairs):
+		"""Bulk variant of valid_move() for solvers and analytics. Takes a
+		sequence of (piece1, piece2) pairs and returns a list of booleans
+		that tell which of them are valid moves. The numpy backend evaluates
+		all pairs in a single vectorised call, the grid backend connects them
+		one by one."""
+		pairs = list(pairs)
+		matching = [ (piece1.tileid == piece2.tileid) for (piece1, piece2) in pairs ]
+		candidates = [ ((piece1.dx, piece1.dz), (piece2.dx, piece2.dz)) for ((piece1, piece2), match) in zip(pairs, matching) if match ]
+		connectable = iter(self._grid.connectable(candidates))
+		return [ match and bool(next(connectable)) for match in matching ]
 
 	def piece_selectable(self, piece):
 		return True
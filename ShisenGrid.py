@@ -0,0 +1,255 @@
+#!/usr/bin/python3
+#
+#	pyglmahjong - Python OpenGL Mahjong and Shisen implementation
+#	Copyright (C) 2015-2018 Johannes Bauer
+#
+#	This file is part of pyglmahjong.
+#
+#	pyglmahjong is free software; you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation; this program is ONLY licensed under
+#	version 3 of the License, later versions are explicitly excluded.
+#
+#	pyglmahjong is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with pyglmahjong; if not, write to the Free Software
+#	Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+#	Johannes Bauer <JohannesBauer@gmx.de>
+
+class ShisenGrid(object):
+	"""Dense occupancy grid of a Shisen board. The grid spans the layout
+	with a vacant border of one cell all around, through which the outer
+	lanes run. Lanes farther out are never needed: whatever passes there
+	can pass along the border as well.
+
+	Occupancy is kept as bitboards, one int per row with a bit for every
+	column and one int per column with a bit for every row. Setting a cell
+	flips two bits; whether a segment is clear and where the nearest
+	occupied cell in some direction lies are a few shifts and masks on a
+	single int. Only whether a cell is occupied matters to this grid, the
+	tile IDs it is given are not kept."""
+
+	def __init__(self, minx, miny, maxx, maxy):
+		(self._x0, self._y0) = (minx - 1, miny - 1)
+		self._width = maxx - minx + 3
+		self._height = maxy - miny + 3
+		# _lowbits[n] has the n lowest bits set
+		self._lowbits = [ (1 << n) - 1 for n in range(max(self._width, self._height) + 1) ]
+		self.clear()
+
+	@classmethod
+	def from_layout(cls, layout):
+		gridpieces = list(layout.iterpieces())
+		return cls(min(gridpiece.dx for gridpiece in gridpieces), min(gridpiece.dz for gridpiece in gridpieces), max(gridpiece.dx for gridpiece in gridpieces), max(gridpiece.dz for gridpiece in gridpieces))
+
+	def clone(self):
+		clone = ShisenGrid.__new__(ShisenGrid)
+		(clone._x0, clone._y0, clone._width, clone._height) = (self._x0, self._y0, self._width, self._height)
+		clone._lowbits = self._lowbits
+		clone._rows = list(self._rows)
+		clone._cols = list(self._cols)
+		return clone
+
+	def clear(self):
+		self._rows = [ 0 ] * self._height
+		self._cols = [ 0 ] * self._width
+
+	def set(self, x, y, tileid):
+		"""Places a tile on the cell (x, y) or, if tileid is None, vacates
+		it."""
+		(i, j) = (x - self._x0, y - self._y0)
+		assert((0 < i < self._width - 1) and (0 < j < self._height - 1))
+		if tileid is not None:
+			self._rows[j] |= 1 << i
+			self._cols[i] |= 1 << j
+		else:
+			self._rows[j] &= ~(1 << i)
+			self._cols[i] &= ~(1 << j)
+
+	def occupied(self, x, y):
+		(i, j) = (x - self._x0, y - self._y0)
+		if (0 <= i < self._width) and (0 <= j < self._height):
+			return ((self._rows[j] >> i) & 1) == 1
+		return False
+
+	def _below(self, bits, n, none):
+		# Highest set bit below bit n
+		bits &= self._lowbits[n]
+		return bits.bit_length() - 1 if (bits != 0) else none
+
+	@staticmethod
+	def _above(bits, n, none):
+		# Lowest set bit above bit n
+		bits >>= n + 1
+		return n + (bits & -bits).bit_length() if (bits != 0) else none
+
+	def _row_clear(self, j, i1, i2):
+		# Cells strictly between columns i1 and i2 in row j
+		if i1 > i2:
+			(i1, i2) = (i2, i1)
+		return (self._rows[j] & self._lowbits[i2]) >> (i1 + 1) == 0
+
+	def _col_clear(self, i, j1, j2):
+		if j1 > j2:
+			(j1, j2) = (j2, j1)
+		return (self._cols[i] & self._lowbits[j2]) >> (j1 + 1) == 0
+
+	def segment_clear(self, x1, y1, x2, y2):
+		"""Checks that all cells of the horizontal or vertical segment from
+		(x1, y1) exclusively to (x2, y2) inclusively are vacant."""
+		(i1, j1, i2, j2) = (x1 - self._x0, y1 - self._y0, x2 - self._x0, y2 - self._y0)
+		if j1 == j2:
+			(bits, start, end) = (self._rows[j1], i1, i2)
+		else:
+			(bits, start, end) = (self._cols[i1], j1, j2)
+		if end > start:
+			return (bits & self._lowbits[end + 1]) >> (start + 1) == 0
+		else:
+			return (bits & self._lowbits[start]) >> end == 0
+
+	def cell(self, x, y):
+		"""Returns the index of the cell (x, y) as used by reachable()."""
+		return (y - self._y0) * self._width + (x - self._x0)
+
+	def coordinates(self, cell):
+		"""Inverse of cell(), returns (x, y) of the cell index."""
+		return ((cell % self._width) + self._x0, (cell // self._width) + self._y0)
+
+	def blockers(self, x, y):
+		"""Returns the indices of the nearest occupied cells left of, right
+		of, above and below the cell (x, y), i.e. of the pieces that would
+		see it first when it was vacated. Directions without any occupied
+		cell are left out."""
+		(i, j) = (x - self._x0, y - self._y0)
+		(w, h) = (self._width, self._height)
+		(row, col) = (self._rows[j], self._cols[i])
+		cells = [ ]
+		neighbour = self._below(row, i, -1)
+		if neighbour >= 0:
+			cells.append(j * w + neighbour)
+		neighbour = self._above(row, i, w)
+		if neighbour < w:
+			cells.append(j * w + neighbour)
+		neighbour = self._below(col, j, -1)
+		if neighbour >= 0:
+			cells.append(neighbour * w + i)
+		neighbour = self._above(col, j, h)
+		if neighbour < h:
+			cells.append(neighbour * w + i)
+		return cells
+
+	def reachable(self, x, y):
+		"""Returns the set of the indices of all occupied cells that can be
+		reached from the cell (x, y) with a path of at most two turns, found
+		in a single sweep: the run of vacant cells along the column (row) of
+		the cell gives the lanes for the middle segment, the runs along each
+		lane the columns (rows) for the last segment, whose ends are the
+		nearest occupied cells in them."""
+		(i0, j0) = (x - self._x0, y - self._y0)
+		(w, h) = (self._width, self._height)
+		(rows, cols, lowbits) = (self._rows, self._cols, self._lowbits)
+		(below, above) = (self._below, self._above)
+		cells = set()
+		add = cells.add
+
+		# First segment vertical, middle segment along rows
+		for j in range(below(cols[i0], j0, -1) + 1, above(cols[i0], j0, h)):
+			rowcell = j * w
+			(lanefirst, lanelast) = (below(rows[j], i0, -1), above(rows[j], i0, w))
+			if lanefirst >= 0:
+				add(rowcell + lanefirst)
+			if lanelast < w:
+				add(rowcell + lanelast)
+			(low, high) = (lowbits[j], j + 1)
+			for i in range(lanefirst + 1, lanelast):
+				bits = cols[i] & low
+				if bits:
+					add((bits.bit_length() - 1) * w + i)
+				bits = cols[i] >> high
+				if bits:
+					add((j + (bits & -bits).bit_length()) * w + i)
+
+		# First segment horizontal, middle segment along columns
+		for i in range(below(rows[j0], i0, -1) + 1, above(rows[j0], i0, w)):
+			(lanefirst, lanelast) = (below(cols[i], j0, -1), above(cols[i], j0, h))
+			if lanefirst >= 0:
+				add(lanefirst * w + i)
+			if lanelast < h:
+				add(lanelast * w + i)
+			(low, high) = (lowbits[i], i + 1)
+			for j in range(lanefirst + 1, lanelast):
+				bits = rows[j] & low
+				if bits:
+					add(j * w + bits.bit_length() - 1)
+				bits = rows[j] >> high
+				if bits:
+					add(j * w + i + (bits & -bits).bit_length())
+		return cells
+
+	@staticmethod
+	def _points(*points):
+		path = [ points[0] ]
+		for point in points[1:]:
+			if point != path[-1]:
+				path.append(point)
+		return path
+
+	def connect(self, x1, y1, x2, y2):
+		"""Finds a path with at most two turns between the cells (x1, y1) and
+		(x2, y2) that only leads through vacant cells. Returns the list of
+		its corner points from start to end, or None if there is no such
+		path. Paths with fewer turns and nearer lanes are preferred."""
+		(i1, j1, i2, j2) = (x1 - self._x0, y1 - self._y0, x2 - self._x0, y2 - self._y0)
+		(w, h) = (self._width, self._height)
+
+		# Vertical runs from both cells give the candidate rows in which a
+		# horizontal segment can join them, horizontal runs the candidate
+		# columns for a vertical segment.
+		(below, above) = (self._below, self._above)
+		(col1, col2) = (self._cols[i1], self._cols[i2])
+		(rowlo, rowhi) = (max(below(col1, j1, -1), below(col2, j2, -1)) + 1, min(above(col1, j1, h), above(col2, j2, h)) - 1)
+		(row1, row2) = (self._rows[j1], self._rows[j2])
+		(collo, colhi) = (max(below(row1, i1, -1), below(row2, i2, -1)) + 1, min(above(row1, i1, w), above(row2, i2, w)) - 1)
+
+		# Straight lines and single turns run along the rows or columns of
+		# the cells themselves
+		for j in (j1, j2):
+			if (rowlo <= j <= rowhi) and self._row_clear(j, i1, i2):
+				return self._points((x1, y1), (x1, j + self._y0), (x2, j + self._y0), (x2, y2))
+		for i in (i1, i2):
+			if (collo <= i <= colhi) and self._col_clear(i, j1, j2):
+				return self._points((x1, y1), (i + self._x0, y1), (i + self._x0, y2), (x2, y2))
+
+		# Two turns, nearest lanes first
+		rows = sorted(range(rowlo, rowhi + 1), key = lambda j: abs(j - j1) + abs(j - j2))
+		for j in rows:
+			if self._row_clear(j, i1, i2):
+				return self._points((x1, y1), (x1, j + self._y0), (x2, j + self._y0), (x2, y2))
+		cols = sorted(range(collo, colhi + 1), key = lambda i: abs(i - i1) + abs(i - i2))
+		for i in cols:
+			if self._col_clear(i, j1, j2):
+				return self._points((x1, y1), (i + self._x0, y1), (i + self._x0, y2), (x2, y2))
+		return None
+
+	def connectable(self, pairs):
+		"""Takes a sequence of ((x1, y1), (x2, y2)) cell pairs and returns a
+		list that tells for each of them whether it can be connected."""
+		return [ self.connect(x1, y1, x2, y2) is not None for ((x1, y1), (x2, y2)) in pairs ]
+
+	def connected_pairs(self, groups):
+		"""Takes a list of groups of cells, each a list of (x, y) tuples, and
+		yields (group, index1, index2) for all pairs of cells within a group
+		that can be connected, with index1 < index2, in order. Sweeps once
+		from every cell but the last of each group."""
+		for (group, cells) in enumerate(groups):
+			indices = [ self.cell(x, y) for (x, y) in cells ]
+			for index1 in range(len(cells) - 1):
+				reachable = self.reachable(*cells[index1])
+				for index2 in range(index1 + 1, len(cells)):
+					if indices[index2] in reachable:
+						yield (group, index1, index2)
@@ -0,0 +1,105 @@
+#!/usr/bin/python3
+#
+#	pyglmahjong - Python OpenGL Mahjong and Shisen implementation
+#	Copyright (C) 2015-2018 Johannes Bauer
+#
+#	This file is part of pyglmahjong.
+#
+#	pyglmahjong is free software; you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation; this program is ONLY licensed under
+#	version 3 of the License, later versions are explicitly excluded.
+#
+#	pyglmahjong is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with pyglmahjong; if not, write to the Free Software
+#	Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+#	Johannes Bauer <JohannesBauer@gmx.de>
+
+import struct
+
+class SolutionCertificate(object):
+	"""Proof that the board dealt with a seed is solvable: the ordered list
+	of pairs removed by a solution. Pieces are identified by their slot, the
+	index of their position in the layout, so that a certificate does not
+	depend on the pieces of any particular board instance. The hash of the
+	layout is kept to detect certificates for a layout that was changed
+	since."""
+
+	_HEADER = struct.Struct("<QB32s")
+
+	def __init__(self, seed, layouthash, pairs):
+		self._seed = seed
+		self._layouthash = layouthash
+		self._pairs = tuple(tuple(pair) for pair in pairs)
+
+	@classmethod
+	def from_moves(cls, seed, layout, moves):
+		"""Creates a certificate from the moves, i.e. (piece1, piece2) tuples,
+		of a solution as returned by BacktrackingSolver.solve()."""
+		graph = layout.occlusion_graph()
+		pairs = [ (graph.getslot(piece1.dx, piece1.dy, piece1.dz), graph.getslot(piece2.dx, piece2.dy, piece2.dz)) for (piece1, piece2) in moves ]
+		return cls(seed, layout.contenthash, pairs)
+
+	@property
+	def seed(self):
+		return self._seed
+
+	@property
+	def layouthash(self):
+		return self._layouthash
+
+	@property
+	def pairs(self):
+		return self._pairs
+
+	def encode(self):
+		"""Returns the certificate as bytes: seed, slot width, layout hash and
+		then all slots in playing order, one byte each if that suffices or
+		two bytes otherwise."""
+		slots = [ slot for pair in self._pairs for slot in pair ]
+		width = 1 if (max(slots, default = 0) < 256) else 2
+		header = self._HEADER.pack(self._seed, width, bytes.fromhex(self._layouthash))
+		return header + struct.pack("<%d%s" % (len(slots), "B" if (width == 1) else "H"), *slots)
+
+	@classmethod
+	def decode(cls, data):
+		(seed, width, layouthash) = cls._HEADER.unpack_from(data)
+		body = data[cls._HEADER.size:]
+		if (width not in (1, 2)) or ((len(body) % (2 * width)) != 0):
+			raise Exception("Malformed solution certificate.")
+		slots = struct.unpack("<%d%s" % (len(body) // width, "B" if (width == 1) else "H"), body)
+		return cls(seed, layouthash.hex(), zip(slots[0::2], slots[1::2]))
+
+	def replay(self, board, layout):
+		"""Plays the certificate on a board that has been freshly dealt with
+		its seed on the given layout, checking every pair with valid_move().
+		The board itself is left unaltered. Returns None if the certificate is
+		a valid solution or a description of the first violation otherwise.
+		Apart from the move checks themselves, this takes linear time."""
+		if self._layouthash != layout.contenthash:
+			return "Certificate is for a different version of the layout."
+		graph = layout.occlusion_graph()
+		board = board.backtrack_clone()
+		pieces = { graph.getslot(piece.dx, piece.dy, piece.dz): piece for piece in board.iterpieces() }
+		for (moveno, (slot1, slot2)) in enumerate(self._pairs, 1):
+			(piece1, piece2) = (pieces.pop(slot1, None), pieces.pop(slot2, None))
+			if (piece1 is None) or (piece2 is None):
+				return "Move #%d removes a vacant slot (%d, %d)." % (moveno, slot1, slot2)
+			if not board.valid_move(piece1, piece2):
+				return "Move #%d of slots (%d, %d) is not valid." % (moveno, slot1, slot2)
+			board.remove_piece(piece1, piece2)
+		if len(pieces) > 0:
+			return "%d pieces remain after the last move." % (len(pieces))
+		return None
+
+	def __len__(self):
+		return len(self._pairs)
+
+	def __str__(self):
+		return "SolutionCertificate<seed %d, %d moves>" % (self._seed, len(self))
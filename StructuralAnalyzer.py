@@ -0,0 +1,163 @@
+#!/usr/bin/python3
+#
+#	pyglmahjong - Python OpenGL Mahjong and Shisen implementation
+#	Copyright (C) 2015-2018 Johannes Bauer
+#
+#	This file is part of pyglmahjong.
+#
+#	pyglmahjong is free software; you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation; this program is ONLY licensed under
+#	version 3 of the License, later versions are explicitly excluded.
+#
+#	pyglmahjong is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with pyglmahjong; if not, write to the Free Software
+#	Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+#	Johannes Bauer <JohannesBauer@gmx.de>
+
+import collections
+
+Deadlock = collections.namedtuple("Deadlock", [ "rule", "description" ])
+
+class StructuralAnalyzer(object):
+	"""Detects Mahjong boards that are unsolvable because of how tiles are
+	stacked and lined up, without playing them. Every rule is a necessary
+	condition for solvability:
+
+	"covered-copies": A piece lies (possibly indirectly) on top of all other
+	remaining copies of its tile, so it can never be matched.
+	"crossed-pairs": Tiles of which exactly two copies remain have to be
+	removed as a pair. If a copy of tile A lies on top of a copy of tile B,
+	the A pair has to go before the B pair; a cycle in that order is a
+	deadlock.
+	"interleaved-row": Within a row of pieces which are only blocked by
+	their row neighbours, pieces can only be removed from either end. Two
+	tiles with two remaining copies each which alternate in a row (A B A B)
+	each require the other pair to be removed first.
+
+	The transitive on-top relation and the rows are computed once per
+	occlusion graph."""
+
+	def __init__(self, graph):
+		self._graph = graph
+		slotcnt = len(graph)
+		order = sorted(range(slotcnt), key = lambda slot: graph.gridpiece(slot).dy)
+
+		# All slots lying (possibly indirectly) on top of / below a slot
+		self._covering = [ 0 ] * slotcnt
+		for slot in reversed(order):
+			for other in graph.above[slot]:
+				self._covering[slot] |= (1 << other) | self._covering[other]
+		self._covered = [ 0 ] * slotcnt
+		for slot in order:
+			for other in graph.below[slot]:
+				self._covered[slot] |= (1 << other) | self._covered[other]
+		self._rows = self._find_rows()
+
+	def _find_rows(self):
+		"""Returns all rows of slots in which each slot has at most one
+		neighbour to the left and to the right, and the neighbour relation is
+		mutual, ordered from left to right."""
+		(left, right) = (self._graph.left, self._graph.right)
+		def linked(slot, other):
+			return (right[slot] == (other, )) and (left[other] == (slot, ))
+
+		rows = [ ]
+		for slot in range(len(self._graph)):
+			if (len(left[slot]) == 0) and (len(right[slot]) == 1):
+				row = [ slot ]
+				while (len(right[row[-1]]) == 1) and linked(row[-1], right[row[-1]][0]):
+					row.append(right[row[-1]][0])
+				if (len(right[row[-1]]) == 0) and (len(row) >= 4):
+					rows.append(row)
+		return rows
+
+	def _describe(self, slot):
+		gridpiece = self._graph.gridpiece(slot)
+		return "(%d, %d, %d)" % (gridpiece.dx, gridpiece.dy, gridpiece.dz)
+
+	def analyze(self, slottiles):
+		"""Takes the tile ID of every slot (None for vacant slots) and returns
+		the first Deadlock found or None if no rule fires."""
+		slotlists = { }
+		for (slot, tileid) in enumerate(slottiles):
+			if tileid is not None:
+				slotlists.setdefault(tileid, [ ]).append(slot)
+		copies = { tileid: sum(1 << slot for slot in slots) for (tileid, slots) in slotlists.items() }
+
+		for (tileid, slots) in slotlists.items():
+			for slot in slots:
+				others = copies[tileid] & ~(1 << slot)
+				if (others & ~self._covered[slot]) == 0:
+					return Deadlock(rule = "covered-copies", description = "Piece at %s covers all other copies of tile %s" % (self._describe(slot), tileid))
+
+		pairs = { tileid: slots for (tileid, slots) in slotlists.items() if len(slots) == 2 }
+		deadlock = self._crossed_pairs(copies, pairs)
+		if deadlock is not None:
+			return deadlock
+		return self._interleaved_rows(slottiles, pairs)
+
+	def _crossed_pairs(self, copies, pairs):
+		# Edge A -> B: the A pair has to be removed before the B pair
+		successors = { }
+		for (tileid, slots) in pairs.items():
+			covering = self._covering[slots[0]] | self._covering[slots[1]]
+			for othertileid in pairs:
+				if (othertileid != tileid) and (copies[othertileid] & covering):
+					successors.setdefault(othertileid, [ ]).append(tileid)
+
+		# Iterative depth-first search for a cycle
+		(unvisited, active, finished) = (0, 1, 2)
+		state = { tileid: unvisited for tileid in pairs }
+		for root in pairs:
+			if state[root] != unvisited:
+				continue
+			state[root] = active
+			stack = [ (root, iter(successors.get(root, [ ]))) ]
+			while len(stack) > 0:
+				(tileid, children) = stack[-1]
+				child = next(children, None)
+				if child is None:
+					state[tileid] = finished
+					stack.pop()
+				elif state[child] == active:
+					cycle = [ entry[0] for entry in stack[[ entry[0] for entry in stack ].index(child):] ]
+					return Deadlock(rule = "crossed-pairs", description = "Pairs of tiles %s each have to be removed before the next" % (" -> ".join(str(tileid) for tileid in cycle + [ child ])))
+				elif state[child] == unvisited:
+					state[child] = active
+					stack.append((child, iter(successors.get(child, [ ]))))
+		return None
+
+	def _interleaved_rows(self, slottiles, pairs):
+		for row in self._rows:
+			# Vacant slots split a row into independent segments
+			segment = [ ]
+			for slot in row + [ None ]:
+				if (slot is not None) and (slottiles[slot] is not None):
+					segment.append(slot)
+					continue
+				deadlock = self._interleaved_segment(slottiles, pairs, segment)
+				if deadlock is not None:
+					return deadlock
+				segment = [ ]
+		return None
+
+	def _interleaved_segment(self, slottiles, pairs, segment):
+		positions = { }
+		for (index, slot) in enumerate(segment):
+			if slottiles[slot] in pairs:
+				positions.setdefault(slottiles[slot], [ ]).append(index)
+		intervals = sorted(tuple(indices) for indices in positions.values() if len(indices) == 2)
+		for (i, (start1, end1)) in enumerate(intervals):
+			for (start2, end2) in intervals[i + 1:]:
+				if start2 > end1:
+					break
+				if end2 > end1:
+					return Deadlock(rule = "interleaved-row", description = "Tiles %s and %s alternate in the row starting at %s" % (slottiles[segment[start1]], slottiles[segment[start2]], self._describe(segment[0])))
+		return None
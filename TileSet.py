@@ -22,6 +22,7 @@
 #	Johannes Bauer <JohannesBauer@gmx.de>
 
 import collections
+import hashlib
 from XMLParser import XMLParser
 from PRNG import PRNG
 
@@ -53,6 +54,9 @@ class TileSetIterator(object):
 
 class TileSet(object):
 	def __init__(self, filename):
+		self._filename = filename
+		with open(filename, "rb") as f:
+			self._contenthash = hashlib.sha256(f.read()).hexdigest()
 		xml = XMLParser().parsefile(filename)
 		self._matchingtiles = [ ]
 		for matchingtiles in xml.matchingtiles:
@@ -67,6 +71,14 @@ class TileSet(object):
 				raise Exception(NotImplemented)
 			self._matchingtiles.append(tiles)
 
+	@property
+	def filename(self):
+		return self._filename
+
+	@property
+	def contenthash(self):
+		return self._contenthash
+
 	def gettexturefile(self, path, resolution, face):
 		return path + "pieces/" + str(resolution) + "/" + face + ".jpg"
 
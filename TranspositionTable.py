@@ -0,0 +1,65 @@
+#!/usr/bin/python3
+#
+#	pyglmahjong - Python OpenGL Mahjong and Shisen implementation
+#	Copyright (C) 2015-2018 Johannes Bauer
+#
+#	This file is part of pyglmahjong.
+#
+#	pyglmahjong is free software; you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation; this program is ONLY licensed under
+#	version 3 of the License, later versions are explicitly excluded.
+#
+#	pyglmahjong is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with pyglmahjong; if not, write to the Free Software
+#	Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+#	Johannes Bauer <JohannesBauer@gmx.de>
+
+import collections
+
+class TranspositionTable(object):
+	"""Records the hashes of positions that have been proven to be dead ends
+	so that the solver does not explore them again when it reaches them via
+	a different order of moves. The table holds at most maxentries hashes;
+	when it is full, the least recently used entry is evicted."""
+
+	def __init__(self, maxentries = 1000000):
+		assert(maxentries > 0)
+		self._maxentries = maxentries
+		self._entries = collections.OrderedDict()
+		self._hits = 0
+		self._evictions = 0
+
+	@property
+	def hits(self):
+		return self._hits
+
+	@property
+	def evictions(self):
+		return self._evictions
+
+	def add(self, key):
+		self._entries[key] = None
+		self._entries.move_to_end(key)
+		if len(self._entries) > self._maxentries:
+			self._entries.popitem(last = False)
+			self._evictions += 1
+
+	def __contains__(self, key):
+		if key in self._entries:
+			self._entries.move_to_end(key)
+			self._hits += 1
+			return True
+		return False
+
+	def __len__(self):
+		return len(self._entries)
+
+	def __str__(self):
+		return "TranspositionTable<%d of %d entries, %d hits, %d evictions>" % (len(self), self._maxentries, self.hits, self.evictions)
@@ -0,0 +1,47 @@
+#!/usr/bin/python3
+#
+#	pyglmahjong - Python OpenGL Mahjong and Shisen implementation
+#	Copyright (C) 2015-2018 Johannes Bauer
+#
+#	This file is part of pyglmahjong.
+#
+#	pyglmahjong is free software; you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation; this program is ONLY licensed under
+#	version 3 of the License, later versions are explicitly excluded.
+#
+#	pyglmahjong is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with pyglmahjong; if not, write to the Free Software
+#	Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+#	Johannes Bauer <JohannesBauer@gmx.de>
+
+import hashlib
+
+class ZobristKeys(object):
+	"""Lazily generated 64 bit Zobrist keys for arbitrary board positions. A
+	board hash is the XOR of the keys of all occupied positions and can
+	therefore be updated incrementally whenever a piece is added or removed.
+	Keys are derived from the position itself, so they are identical across
+	processes."""
+
+	def __init__(self):
+		self._keys = { }
+
+	def __getitem__(self, position):
+		key = self._keys.get(position)
+		if key is None:
+			key = int.from_bytes(hashlib.md5(repr(position).encode("ascii")).digest()[:8], byteorder = "little")
+			self._keys[position] = key
+		return key
+
+	def hash(self, positions):
+		value = 0
+		for position in positions:
+			value ^= self[position]
+		return value
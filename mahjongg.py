@@ -21,79 +21,56 @@
 #
 #	Johannes Bauer <JohannesBauer@gmx.de>
 
-import os
 import sys
 
 from FriendlyArgumentParser import FriendlyArgumentParser
+from Configuration import Configuration
 from Game import Game
 from Layout import Layout
 from TileSet import TileSet
 from MahjongBoard import MahjongBoard
 from ShisenBoard import ShisenBoard
+from SeedPipeline import SeedPipeline
 from OpenGLDisplay import OpenGLDisplay
 from GameController import GameController
 
-class Configuration(object):
-	def __init__(self, args):
-		self._args = args
+if __name__ == "__main__":
+	parser = FriendlyArgumentParser()
+	parser.add_argument("--datadir", metavar = "path", type = str, default = None, help = "Specifies directory in which the data files are located. Defaults to data/ relative to executable.")
+	parser.add_argument("-g", "--game", choices = [ "mahjong", "shisen" ], default = "mahjong", help = "Specifies which game to play")
+	parser.add_argument("-t", "--tileset", metavar = "name", default = "default", help = "Name of the tileset to use. Defaults to %(default)s")
+	parser.add_argument("-l", "--layout", metavar = "name", help = "Name of the board layout to use.")
+	parser.add_argument("-s", "--seed", metavar = "seed", type = int, help = "Seed of the game to use. Randomly chosen if omitted.")
+	parser.add_argument("--texresolution", metavar = "res", type = int, default = 512, help = "Specify texture resolution that should be used. Default is %(default)s.")
+	parser.add_argument("--allow-unsolvable", action = "store_true", default = False, help = "Allow non-solvable board layouts.")
+	parser.add_argument("--seeddb", metavar = "filename", type = str, help = "Seed database from which a known-solvable seed is drawn when no seed is given.")
+	parser.add_argument("--generator", choices = [ "random", "reverse" ], default = "random", help = "Board generator to use. \"random\" shuffles the tiles and checks the board for solvability, \"reverse\" constructs a Mahjong board that is solvable by design. Defaults to %(default)s.")
+	parser.add_argument("--difficulty", choices = [ "easy", "medium", "hard" ], default = "medium", help = "Difficulty of boards built by the reverse generator. Defaults to %(default)s.")
+	parser.add_argument("--stages", metavar = "stages", type = str, default = "structural,playout", help = "Comma-separated seed pipeline stages a random board is run through until one decides whether it is solvable, out of structural, playout[:attempts], rollouts[:count] and solver[:nodelimit]. Only boards found solvable are played. Defaults to %(default)s.")
+	parser.add_argument("--backend", choices = [ "grid", "numpy" ], default = "grid", help = "Grid implementation of the Shisen board. \"numpy\" evaluates the candidate moves of a position in bulk with vectorised operations. Defaults to %(default)s.")
+	parser.add_argument("--inflight", metavar = "count", type = int, default = 1, help = "Number of random seeds that are checked in parallel worker processes when looking for a solvable board. Defaults to %(default)d.")
+	args = parser.parse_args(sys.argv[1:])
+	if (args.generator == "reverse") and (args.game != "mahjong"):
+		parser.error("The reverse generator is only available for Mahjong.")
+	try:
+		SeedPipeline.parse(args.stages)
+	except Exception as e:
+		parser.error(str(e))
 
-	@property
-	def datadir(self):
-		if self._args.datadir is None:
-			executable_dir = os.path.dirname(os.path.realpath(sys.argv[0])) + "/"
-			return executable_dir + "data/"
-		else:
-			return self._args.datadir
+	config = Configuration(args)
+	layout = Layout(config.layoutfile)
+	tileset = TileSet(config.tilesetfile)
+	if args.game == "mahjong":
+		board = MahjongBoard(layout)
+	elif args.game == "shisen":
+		board = ShisenBoard(layout, args.backend)
+	else:
+		raise Exception(NotImplemented)
+	game = Game(config, layout, tileset, board)
+	game.new()
 
-	@property
-	def layout(self):
-		if self._args.layout is not None:
-			return self._args.layout
-		else:
-			return {
-				"mahjong":	"easy",
-				"shisen":	"14x6",
-			}[self._args.game]
+	display = OpenGLDisplay()
 
-	@property
-	def texpath(self):
-		return self.datadir + "textures/"
-
-	@property
-	def tilesetfile(self):
-		return self.datadir + "tileset/" + self._args.tileset + ".xml"
-
-	@property
-	def layoutfile(self):
-		return self.datadir + "layout/" + self._args.game + "/" + self.layout + ".xml"
-
-	def __getattr__(self, name):
-		return getattr(self._args, name)
-
-parser = FriendlyArgumentParser()
-parser.add_argument("--datadir", metavar = "path", type = str, default = None, help = "Specifies directory in which the data files are located. Defaults to data/ relative to executable.")
-parser.add_argument("-g", "--game", choices = [ "mahjong", "shisen" ], default = "mahjong", help = "Specifies which game to play")
-parser.add_argument("-t", "--tileset", metavar = "name", default = "default", help = "Name of the tileset to use. Defaults to %(default)s")
-parser.add_argument("-l", "--layout", metavar = "name", help = "Name of the board layout to use.")
-parser.add_argument("-s", "--seed", metavar = "seed", type = int, help = "Seed of the game to use. Randomly chosen if omitted.")
-parser.add_argument("--texresolution", metavar = "res", type = int, default = 512, help = "Specify texture resolution that should be used. Default is %(default)s.")
-parser.add_argument("--allow-unsolvable", action = "store_true", default = False, help = "Allow non-solvable board layouts.")
-args = parser.parse_args(sys.argv[1:])
-
-config = Configuration(args)
-layout = Layout(config.layoutfile)
-tileset = TileSet(config.tilesetfile)
-if args.game == "mahjong":
-	board = MahjongBoard(layout.gridlen)
-elif args.game == "shisen":
-	board = ShisenBoard()
-else:
-	raise Exception(NotImplemented)
-game = Game(config, layout, tileset, board)
-game.new()
-
-display = OpenGLDisplay()
-
-gamecontroller = GameController(args, game, display)
+	gamecontroller = GameController(args, game, display)
 
 
@@ -0,0 +1,115 @@
+#!/usr/bin/python3
+#
+#	pyglmahjong - Python OpenGL Mahjong and Shisen implementation
+#	Copyright (C) 2015-2018 Johannes Bauer
+#
+#	This file is part of pyglmahjong.
+#
+#	pyglmahjong is free software; you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation; this program is ONLY licensed under
+#	version 3 of the License, later versions are explicitly excluded.
+#
+#	pyglmahjong is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with pyglmahjong; if not, write to the Free Software
+#	Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+#	Johannes Bauer <JohannesBauer@gmx.de>
+
+import sys
+
+from FriendlyArgumentParser import FriendlyArgumentParser
+from Configuration import Configuration
+from Layout import Layout
+from TileSet import TileSet
+from SeedDatabase import SeedDatabase
+from SeedChecker import SeedChecker
+from SeedPipeline import SeedPipeline
+from SolutionCertificate import SolutionCertificate
+from StopWatch import StopWatch
+
+def _seeds(first):
+	while True:
+		yield first
+		first += 1
+
+def main():
+	parser = FriendlyArgumentParser(description = "Build or extend a database of seeds that are verified to be solvable.")
+	parser.add_argument("--datadir", metavar = "path", type = str, default = None, help = "Specifies directory in which the data files are located. Defaults to data/ relative to executable.")
+	parser.add_argument("-g", "--game", choices = [ "mahjong", "shisen" ], default = "mahjong", help = "Specifies which game the seeds are for")
+	parser.add_argument("-t", "--tileset", metavar = "name", default = "default", help = "Name of the tileset to use. Defaults to %(default)s")
+	parser.add_argument("-l", "--layout", metavar = "name", help = "Name of the board layout to use.")
+	parser.add_argument("-n", "--count", metavar = "count", type = int, default = 100, help = "Number of solvable seeds to add to the database. Defaults to %(default)d.")
+	parser.add_argument("--nodelimit", metavar = "nodes", type = int, default = 1000000, help = "Maximum number of solver nodes spent on a single seed before it is skipped. Defaults to %(default)d.")
+	parser.add_argument("--timeout", metavar = "secs", type = float, default = 60, help = "Maximum time in seconds spent on a single seed before it is skipped. Defaults to %(default).0f.")
+	parser.add_argument("--stages", metavar = "stages", type = str, default = "structural,solver", help = "Comma-separated seed pipeline stages every seed is run through, out of structural, playout[:attempts], rollouts[:count] and solver[:nodelimit]. Defaults to %(default)s.")
+	parser.add_argument("--verify", action = "store_true", default = False, help = "Instead of adding seeds, replay the solution certificates of all seeds stored for the layout and tileset names. Valid seeds of collections for older versions of the files are carried over to the current collection.")
+	parser.add_argument("--list", action = "store_true", default = False, help = "Only list the seed collections in the database.")
+	parser.add_argument("dbfile", metavar = "dbfile", type = str, help = "Seed database file, created if it does not exist.")
+	args = parser.parse_args(sys.argv[1:])
+	try:
+		SeedPipeline.parse(args.stages)
+	except Exception as e:
+		parser.error(str(e))
+
+	seeddb = SeedDatabase(args.dbfile)
+	if args.list:
+		for (collectionid, layoutfile, tilesetfile, nextseed, seedcnt) in seeddb.itercollections():
+			print("%-20s %-20s %7d solvable seeds of %d examined" % (layoutfile, tilesetfile, seedcnt, nextseed))
+		return
+
+	config = Configuration(args)
+	layout = Layout(config.layoutfile)
+	tileset = TileSet(config.tilesetfile)
+	checker = SeedChecker(args.game, layout, tileset, nodelimit = args.nodelimit, timeout = args.timeout, stages = args.stages)
+	collectionid = seeddb.getcollection(layout, tileset, create = True)
+
+	if args.verify:
+		(valid, invalid, uncertified, carried) = (0, 0, 0, 0)
+		stopwatch = StopWatch()
+		for verifycollectionid in seeddb.find_collections(layout, tileset):
+			for (seed, nodes, elapsed, certificate) in list(seeddb.iterseeds(verifycollectionid)):
+				if certificate is None:
+					uncertified += 1
+					continue
+				violation = checker.verify(certificate)
+				if violation is not None:
+					print("Seed %d: invalid, %s" % (seed, violation))
+					invalid += 1
+					continue
+				valid += 1
+				if (verifycollectionid != collectionid) and (not seeddb.has_seed(collectionid, seed)):
+					seeddb.add_seed(collectionid, seed, nodes = nodes, elapsed = elapsed, certificate = certificate)
+					carried += 1
+		seeddb.commit()
+		print("Verified %d certificates in %s: %d valid, %d invalid, %d seeds without certificate, %d carried over." % (valid + invalid, stopwatch, valid, invalid, uncertified, carried))
+		seeddb.close()
+		return
+
+	added = 0
+	stopwatch = StopWatch()
+	for (seed, result) in checker.screen(_seeds(seeddb.nextseed(collectionid))):
+		nodes = result.detail.nodes if (result.stage == "solver") else 0
+		if result.stage is None:
+			print("Seed %d: %s" % (seed, result.status))
+		else:
+			print("Seed %d: %s by %s after %d nodes" % (seed, result.status, result.stage, nodes))
+		if result.status == "solved":
+			certificate = SolutionCertificate.from_moves(seed, layout, result.moves) if (result.moves is not None) else None
+			seeddb.add_seed(collectionid, seed, nodes = nodes, elapsed = result.elapsed, certificate = certificate)
+			added += 1
+		seeddb.set_nextseed(collectionid, seed + 1)
+		seeddb.commit()
+		if added >= args.count:
+			break
+	print("Added %d seeds for %s with %s in %s, %d in total." % (added, layout, tileset, stopwatch, seeddb.seedcnt(collectionid)))
+	print(checker.pipeline.format_statistics())
+	seeddb.close()
+
+if __name__ == "__main__":
+	main()
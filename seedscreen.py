@@ -0,0 +1,114 @@
+#!/usr/bin/python3
+#
+#	pyglmahjong - Python OpenGL Mahjong and Shisen implementation
+#	Copyright (C) 2015-2018 Johannes Bauer
+#
+#	This file is part of pyglmahjong.
+#
+#	pyglmahjong is free software; you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation; this program is ONLY licensed under
+#	version 3 of the License, later versions are explicitly excluded.
+#
+#	pyglmahjong is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with pyglmahjong; if not, write to the Free Software
+#	Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+#	Johannes Bauer <JohannesBauer@gmx.de>
+
+import os
+import sys
+import collections
+import multiprocessing
+
+from FriendlyArgumentParser import FriendlyArgumentParser
+from Configuration import Configuration
+from Layout import Layout
+from TileSet import TileSet
+from SeedChecker import SeedChecker
+from SeedPipeline import SeedPipeline
+from StopWatch import StopWatch
+from DifficultyEstimator import DifficultyEstimator
+
+_checker = None
+_estimator = None
+
+def _init_worker(args):
+	global _checker, _estimator
+	config = Configuration(args)
+	_checker = SeedChecker(args.game, Layout(config.layoutfile), TileSet(config.tilesetfile), nodelimit = args.nodelimit, timeout = args.timeout, stages = args.stages, backend = args.backend)
+	if args.score:
+		_estimator = DifficultyEstimator(probes = args.probes)
+
+def _check_seed(seed):
+	result = _checker.check(seed)
+	if (_estimator is not None) and (result.status == "solved"):
+		score = _checker.rate(seed, _estimator, result.moves).score
+	else:
+		score = None
+	return (seed, result, score, os.getpid())
+
+def _read_done_seeds(filename):
+	done = set()
+	if os.path.exists(filename):
+		with open(filename) as f:
+			for line in f:
+				fields = line.split()
+				if len(fields) > 0:
+					done.add(int(fields[0]))
+	return done
+
+if __name__ == "__main__":
+	parser = FriendlyArgumentParser(description = "Check a range of seeds for solvability in parallel, without starting the game.")
+	parser.add_argument("--datadir", metavar = "path", type = str, default = None, help = "Specifies directory in which the data files are located. Defaults to data/ relative to executable.")
+	parser.add_argument("-g", "--game", choices = [ "mahjong", "shisen" ], default = "mahjong", help = "Specifies which game the seeds are for")
+	parser.add_argument("-t", "--tileset", metavar = "name", default = "default", help = "Name of the tileset to use. Defaults to %(default)s")
+	parser.add_argument("-l", "--layout", metavar = "name", help = "Name of the board layout to use.")
+	parser.add_argument("-j", "--processes", metavar = "count", type = int, default = multiprocessing.cpu_count(), help = "Number of worker processes. Defaults to %(default)d.")
+	parser.add_argument("--nodelimit", metavar = "nodes", type = int, default = 1000000, help = "Maximum number of solver nodes spent on a single seed before it is reported as unknown. Defaults to %(default)d.")
+	parser.add_argument("--timeout", metavar = "secs", type = float, default = 60, help = "Maximum time in seconds spent on a single seed before it is reported as unknown. Defaults to %(default).0f.")
+	parser.add_argument("--stages", metavar = "stages", type = str, default = "structural,solver", help = "Comma-separated seed pipeline stages every seed is run through, out of structural, playout[:attempts], rollouts[:count] and solver[:nodelimit]. Defaults to %(default)s.")
+	parser.add_argument("--backend", choices = [ "grid", "numpy" ], default = "grid", help = "Grid implementation of the Shisen board. \"numpy\" evaluates the candidate moves of a position in bulk with vectorised operations. Defaults to %(default)s.")
+	parser.add_argument("--score", action = "store_true", default = False, help = "Rate the difficulty of every solvable seed and append the score to its output line.")
+	parser.add_argument("--probes", metavar = "count", type = int, default = 256, help = "Number of random probes used to rate the difficulty of a seed. Defaults to %(default)d.")
+	parser.add_argument("--report", metavar = "count", type = int, default = 100, help = "Print worker statistics every this many seeds. Defaults to %(default)d.")
+	parser.add_argument("-o", "--output", metavar = "filename", type = str, required = True, help = "File the results are appended to, one line per seed with its status, solver nodes, time, deciding stage and difficulty score. Seeds already present in it are skipped, so an interrupted run can be resumed.")
+	parser.add_argument("first", metavar = "first", type = int, help = "First seed to check.")
+	parser.add_argument("last", metavar = "last", type = int, help = "Last seed to check.")
+	args = parser.parse_args(sys.argv[1:])
+	try:
+		pipeline = SeedPipeline.parse(args.stages)
+	except Exception as e:
+		parser.error(str(e))
+
+	done = _read_done_seeds(args.output)
+	seeds = [ seed for seed in range(args.first, args.last + 1) if seed not in done ]
+	print("%d seeds to check, %d already done." % (len(seeds), args.last - args.first + 1 - len(seeds)))
+
+	def report():
+		for (pid, (seedcnt, busytime)) in sorted(workerstats.items()):
+			print("    worker %d: %d seeds, %.1f seeds/sec" % (pid, seedcnt, seedcnt / busytime if (busytime > 0) else 0))
+		print(pipeline.format_statistics())
+
+	statuses = collections.Counter()
+	workerstats = { }
+	stopwatch = StopWatch()
+	with open(args.output, "a") as f, multiprocessing.Pool(processes = args.processes, initializer = _init_worker, initargs = (args, )) as pool:
+		for (seed, result, score, pid) in pool.imap_unordered(_check_seed, seeds):
+			nodes = result.detail.nodes if (result.stage == "solver") else 0
+			print("%d %s %d %.3f %s %s" % (seed, result.status, nodes, result.elapsed, result.stage or "-", ("%.2f" % (score)) if (score is not None) else "-"), file = f, flush = True)
+			pipeline.account(result)
+			statuses[result.status] += 1
+			(seedcnt, busytime) = workerstats.get(pid, (0, 0))
+			workerstats[pid] = (seedcnt + 1, busytime + result.elapsed)
+			if (sum(statuses.values()) % args.report) == 0:
+				print("%d seeds checked: %s" % (sum(statuses.values()), ", ".join("%d %s" % (count, status) for (status, count) in sorted(statuses.items()))))
+				report()
+
+	print("Checked %d seeds in %s: %s" % (sum(statuses.values()), stopwatch, ", ".join("%d %s" % (count, status) for (status, count) in sorted(statuses.items()))))
+	report()
@@ -0,0 +1,117 @@
+#!/usr/bin/python3
+#
+#	pyglmahjong - Python OpenGL Mahjong and Shisen implementation
+#	Copyright (C) 2015-2018 Johannes Bauer
+#
+#	This file is part of pyglmahjong.
+#
+#	pyglmahjong is free software; you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation; this program is ONLY licensed under
+#	version 3 of the License, later versions are explicitly excluded.
+#
+#	pyglmahjong is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with pyglmahjong; if not, write to the Free Software
+#	Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+#	Johannes Bauer <JohannesBauer@gmx.de>
+
+import os
+import random
+import itertools
+import collections
+
+from Game import Game
+from Layout import Layout, GridPiece
+from OcclusionGraph import OcclusionGraph
+from TileSet import TileSet
+from MahjongBoard import MahjongBoard
+from ShisenBoard import ShisenBoard
+
+StackPiece = collections.namedtuple("StackPiece", [ "dx", "dy", "dz", "tileid" ])
+
+_DATADIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+
+def deal(game, layoutname, seed, backend = "grid"):
+	"""Returns the board of the given game and layout name, dealt with the
+	seed from the default tileset."""
+	layout = Layout(os.path.join(_DATADIR, "layout", game, layoutname + ".xml"))
+	tileset = TileSet(os.path.join(_DATADIR, "tileset", "default.xml"))
+	if game == "mahjong":
+		board = MahjongBoard(layout)
+	else:
+		board = ShisenBoard(layout, backend)
+	return Game(None, layout, tileset, board).deal(seed)
+
+def mahjong_stacks(seed):
+	"""Returns the occlusion graph, the tile IDs of its slots and the
+	position as a dict of (dx, dy, dz) to StackPiece of random stacks in
+	two rows of four. All tiles have four copies, except for a pair if the
+	number of pieces requires it."""
+	rnd = random.Random(seed)
+	gridpieces = [ GridPiece(2 * x, y, 2 * z) for x in range(4) for z in range(2) for y in range(rnd.randint(1, 3)) ]
+	gridpieces = gridpieces[:len(gridpieces) - (len(gridpieces) % 2)]
+	quads = len(gridpieces) - (len(gridpieces) % 4)
+	tileids = [ index // 4 for index in range(quads) ] + [ 100 + (index // 2) for index in range(len(gridpieces) - quads) ]
+	rnd.shuffle(tileids)
+	pieces = { (gridpiece.dx, gridpiece.dy, gridpiece.dz): StackPiece(gridpiece.dx, gridpiece.dy, gridpiece.dz, tileid) for (gridpiece, tileid) in zip(gridpieces, tileids) }
+	return (OcclusionGraph(2, gridpieces), tileids, pieces)
+
+def mahjong_occlusions(pieces, gridlen, piece):
+	"""Brute force counterpart of MahjongBoard.get_occlusions(), as the
+	board computed it before the occlusion graph: pieces is a dict of
+	(dx, dy, dz) to piece."""
+	occlusions = set()
+	near = range(-gridlen + 1, gridlen)
+	for xoffset in near:
+		for zoffset in near:
+			candidate = pieces.get((piece.dx + xoffset, piece.dy + 1, piece.dz + zoffset))
+			if candidate is not None:
+				occlusions.add(("top", candidate))
+	left = set(("left", pieces[(piece.dx - gridlen, piece.dy, piece.dz + zoffset)]) for zoffset in near if (piece.dx - gridlen, piece.dy, piece.dz + zoffset) in pieces)
+	right = set(("right", pieces[(piece.dx + gridlen, piece.dy, piece.dz + zoffset)]) for zoffset in near if (piece.dx + gridlen, piece.dy, piece.dz + zoffset) in pieces)
+	if (len(left) > 0) and (len(right) > 0):
+		occlusions |= left | right
+	return occlusions
+
+def mahjong_moves(pieces, gridlen):
+	"""Returns the set of all moves as frozensets of two pieces, with
+	occlusions found by mahjong_occlusions()."""
+	free = [ piece for piece in pieces.values() if (len(mahjong_occlusions(pieces, gridlen, piece)) == 0) ]
+	return set(frozenset((piece1, piece2)) for (piece1, piece2) in itertools.combinations(free, 2) if (piece1.tileid == piece2.tileid))
+
+def mahjong_solvable(pieces, gridlen, memo):
+	"""Exhaustively decides whether the Mahjong position given as a dict
+	of (dx, dy, dz) to piece can be cleared."""
+	key = frozenset((position, piece.tileid) for (position, piece) in pieces.items())
+	if key not in memo:
+		memo[key] = (len(pieces) == 0) or any(mahjong_solvable({ position: piece for (position, piece) in pieces.items() if piece not in move }, gridlen, memo) for move in mahjong_moves(pieces, gridlen))
+	return memo[key]
+
+def shisen_paths(occupied, bounds, start):
+	"""Brute force counterpart of reachable(): walks all paths with at most
+	two turns from start through the vacant cells within bounds, given as
+	(minx, miny, maxx, maxy), and returns the set of occupied cells at
+	their ends."""
+	(minx, miny, maxx, maxy) = bounds
+	found = set()
+	def walk(x, y, dx, dy, turns):
+		while True:
+			(x, y) = (x + dx, y + dy)
+			if not ((minx <= x <= maxx) and (miny <= y <= maxy)):
+				return
+			if (x, y) in occupied:
+				found.add((x, y))
+				return
+			if turns < 2:
+				walk(x, y, dy, dx, turns + 1)
+				walk(x, y, -dy, -dx, turns + 1)
+	for (dx, dy) in ((1, 0), (-1, 0), (0, 1), (0, -1)):
+		walk(*start, dx, dy, 0)
+	found.discard(start)
+	return found
@@ -0,0 +1,81 @@
+#!/usr/bin/python3
+#
+#	pyglmahjong - Python OpenGL Mahjong and Shisen implementation
+#	Copyright (C) 2015-2018 Johannes Bauer
+#
+#	This file is part of pyglmahjong.
+#
+#	pyglmahjong is free software; you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation; this program is ONLY licensed under
+#	version 3 of the License, later versions are explicitly excluded.
+#
+#	pyglmahjong is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with pyglmahjong; if not, write to the Free Software
+#	Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+#	Johannes Bauer <JohannesBauer@gmx.de>
+
+import math
+import unittest
+
+from MahjongBitboard import MahjongBitboard
+from DifficultyEstimator import DifficultyEstimator
+from Backtracking import BacktrackingSolver
+from tests.boards import deal, mahjong_stacks, mahjong_moves
+
+class DifficultyEstimatorTests(unittest.TestCase):
+	@classmethod
+	def _count(cls, pieces, memo):
+		"""Returns the number of move sequences that clear the position and the
+		probability that uniformly random play does."""
+		if len(pieces) == 0:
+			return (1, 1)
+		key = frozenset(pieces.items())
+		if key not in memo:
+			(solutions, rate) = (0, 0)
+			moves = mahjong_moves(pieces, 2)
+			for move in moves:
+				(childsolutions, childrate) = cls._count({ position: piece for (position, piece) in pieces.items() if piece not in move }, memo)
+				solutions += childsolutions
+				rate += childrate / len(moves)
+			memo[key] = (solutions, rate)
+		return memo[key]
+
+	def test_exact(self):
+		memo = { }
+		solvable = 0
+		for seed in range(40):
+			(graph, tileids, pieces) = mahjong_stacks(seed)
+			(solutions, rate) = self._count(pieces, memo)
+			report = DifficultyEstimator(probes = 16, seed = seed).analyze(MahjongBitboard(graph, tileids))
+			self.assertTrue(report.exact, seed)
+			self.assertEqual(report.solutions, solutions, seed)
+			self.assertAlmostEqual(report.success_rate, rate, msg = seed)
+			self.assertEqual(math.isinf(report.score), solutions == 0, seed)
+			solvable += solutions > 0
+		self.assertGreater(solvable, 0)
+
+	def test_known_solution(self):
+		board = deal("mahjong", "easy", 1)
+		solution = BacktrackingSolver(board).solve()
+		estimator = DifficultyEstimator(probes = 4, endgame = 0, nodelimit = 50, seed = 0)
+		for report in (estimator.analyze(board, solution = solution), estimator.analyze(board)):
+			self.assertFalse(report.exact)
+			self.assertGreaterEqual(report.solutions, 1)
+			self.assertGreater(report.success_rate, 0)
+			self.assertFalse(math.isinf(report.score))
+
+	def test_proven_unsolvable(self):
+		report = DifficultyEstimator(probes = 4, endgame = 0, nodelimit = 50, seed = 0).analyze(deal("mahjong", "easy", 2))
+		self.assertTrue(report.exact)
+		self.assertEqual(report.solutions, 0)
+		self.assertTrue(math.isinf(report.score))
+
+if __name__ == "__main__":
+	unittest.main()
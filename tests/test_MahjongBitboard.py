@@ -0,0 +1,121 @@
+#!/usr/bin/python3
+#
+#	pyglmahjong - Python OpenGL Mahjong and Shisen implementation
+#	Copyright (C) 2015-2018 Johannes Bauer
+#
+#	This file is part of pyglmahjong.
+#
+#	pyglmahjong is free software; you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation; this program is ONLY licensed under
+#	version 3 of the License, later versions are explicitly excluded.
+#
+#	pyglmahjong is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with pyglmahjong; if not, write to the Free Software
+#	Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+#	Johannes Bauer <JohannesBauer@gmx.de>
+
+import random
+import unittest
+
+from MahjongBitboard import MahjongBitboard
+from Backtracking import BacktrackingSolver
+from tests.boards import deal, mahjong_stacks, mahjong_occlusions, mahjong_moves, mahjong_solvable
+
+class MahjongBitboardTests(unittest.TestCase):
+	@staticmethod
+	def _pieces(board):
+		return { (piece.dx, piece.dy, piece.dz): piece for piece in board.iterpieces() }
+
+	@staticmethod
+	def _play(board, engine, rnd):
+		"""Makes a random move on both the board and its engine. Returns False
+		if there is none."""
+		choices = { frozenset(board.backtrack_translate(choice)): choice for choice in engine.backtrack_allchoices() }
+		moves = list(board.possible_moves())
+		if len(moves) == 0:
+			return False
+		move = rnd.choice(moves)
+		board.remove_piece(*move)
+		engine.backtrack_makechoice(choices[frozenset(move)])
+		return True
+
+	def test_moves(self):
+		for (layoutname, seed) in (("easy", 0), ("easy", 1), ("zigurrat", 0), ("4bridge", 0)):
+			board = deal("mahjong", layoutname, seed)
+			gridlen = board.occlusion_graph.gridlen
+			engine = board.backtrack_engine()
+			rnd = random.Random(seed)
+			while True:
+				pieces = self._pieces(board)
+				moves = mahjong_moves(pieces, gridlen)
+				free = set(piece for piece in pieces.values() if (len(mahjong_occlusions(pieces, gridlen, piece)) == 0))
+				for piece in pieces.values():
+					self.assertEqual(board.get_occlusions(piece), mahjong_occlusions(pieces, gridlen, piece))
+					self.assertEqual(board.piece_occluded(piece), piece not in free)
+				self.assertEqual(set(board.nonoccludedpieces()), free)
+				self.assertEqual(set(frozenset(move) for move in board.possible_moves()), moves)
+				self.assertEqual(board.possible_movecnt(), len(moves))
+				self.assertEqual(bin(engine.free).count("1"), len(free))
+				self.assertEqual(engine.piececnt, len(pieces))
+				choices = list(engine.backtrack_allchoices())
+				self.assertEqual(set(frozenset(board.backtrack_translate(choice)) for choice in choices), moves)
+				self.assertLessEqual(set(engine.backtrack_choices()), set(choices))
+				if not self._play(board, engine, rnd):
+					break
+
+	@staticmethod
+	def _move(graph, pieces, choice):
+		return frozenset(pieces[tuple(graph.gridpiece(slot))] for slot in choice)
+
+	def test_forced_moves(self):
+		memo = { }
+		forced = 0
+		for seed in range(40):
+			(graph, tileids, pieces) = mahjong_stacks(seed)
+			engine = MahjongBitboard(graph, tileids)
+			rnd = random.Random(seed)
+			while True:
+				choices = list(engine.backtrack_allchoices())
+				self.assertEqual(set(self._move(graph, pieces, choice) for choice in choices), mahjong_moves(pieces, 2))
+				if len(choices) == 0:
+					break
+				forcedchoices = list(engine.backtrack_choices())
+				if len(forcedchoices) < len(choices):
+					# Only a choice that keeps a solvable position solvable
+					# may be forced
+					forced += 1
+					move = self._move(graph, pieces, forcedchoices[0])
+					after = { position: piece for (position, piece) in pieces.items() if piece not in move }
+					self.assertEqual(mahjong_solvable(after, 2, memo), mahjong_solvable(pieces, 2, memo))
+				choice = rnd.choice(choices)
+				move = self._move(graph, pieces, choice)
+				pieces = { position: piece for (position, piece) in pieces.items() if piece not in move }
+				engine.backtrack_makechoice(choice)
+		self.assertGreater(forced, 0)
+
+	def test_solver_verdicts(self):
+		memo = { }
+		verdicts = set()
+		for seed in range(40):
+			(graph, tileids, pieces) = mahjong_stacks(seed)
+			solvable = mahjong_solvable(pieces, 2, memo)
+			result = BacktrackingSolver(MahjongBitboard(graph, tileids)).run()
+			self.assertEqual(result.status, "solved" if solvable else "unsolvable", seed)
+			verdicts.add(result.status)
+			if solvable:
+				for choice in result.moves:
+					move = self._move(graph, pieces, choice)
+					self.assertIn(move, mahjong_moves(pieces, 2))
+					pieces = { position: piece for (position, piece) in pieces.items() if piece not in move }
+				self.assertEqual(len(pieces), 0)
+		self.assertEqual(verdicts, { "solved", "unsolvable" })
+
+if __name__ == "__main__":
+	unittest.main()
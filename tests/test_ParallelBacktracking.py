@@ -0,0 +1,86 @@
+#!/usr/bin/python3
+#
+#	pyglmahjong - Python OpenGL Mahjong and Shisen implementation
+#	Copyright (C) 2015-2018 Johannes Bauer
+#
+#	This file is part of pyglmahjong.
+#
+#	pyglmahjong is free software; you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation; this program is ONLY licensed under
+#	version 3 of the License, later versions are explicitly excluded.
+#
+#	pyglmahjong is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with pyglmahjong; if not, write to the Free Software
+#	Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+#	Johannes Bauer <JohannesBauer@gmx.de>
+
+import unittest
+
+from MahjongBitboard import MahjongBitboard
+from Backtracking import BacktrackingSolver
+from ParallelBacktracking import ParallelBacktrackingSolver
+from tests.boards import deal, mahjong_stacks, mahjong_solvable
+
+_DEALS = (("mahjong", "easy", 1), ("mahjong", "easy", 2), ("mahjong", "easy", 3), ("shisen", "21x10", 0), ("shisen", "21x10", 1))
+
+class ParallelBacktrackingTests(unittest.TestCase):
+	def _assert_solution(self, board, moves):
+		for move in moves:
+			self.assertIn(frozenset(move), set(frozenset(move) for move in board.possible_moves()))
+			board.remove_piece(*move)
+		self.assertEqual(board.piececnt, 0)
+
+	def test_verdicts(self):
+		for (game, layoutname, seed) in _DEALS:
+			serial = BacktrackingSolver(deal(game, layoutname, seed)).run()
+			board = deal(game, layoutname, seed)
+			result = ParallelBacktrackingSolver(board, processes = 2).run()
+			self.assertEqual(result.status, serial.status, (game, layoutname, seed))
+			if result.status == "solved":
+				self._assert_solution(board, result.moves)
+
+	def test_stacks(self):
+		memo = { }
+		for seed in range(20):
+			(graph, tileids, pieces) = mahjong_stacks(seed)
+			result = ParallelBacktrackingSolver(MahjongBitboard(graph, tileids), processes = 2).run()
+			self.assertEqual(result.status, "solved" if mahjong_solvable(pieces, 2, memo) else "unsolvable", seed)
+
+	def test_progress(self):
+		reports = [ ]
+		result = ParallelBacktrackingSolver(deal("mahjong", "easy", 2), processes = 2).run(progress = reports.append, progressinterval = 100)
+		self.assertEqual(result.status, "unsolvable")
+		self.assertGreater(len(reports), 0)
+		for report in reports:
+			self.assertLessEqual(report.nodes, result.nodes)
+			self.assertLessEqual(report.depth, report.maxdepth)
+
+	def test_split(self):
+		for (game, layoutname, seed) in _DEALS:
+			solver = ParallelBacktrackingSolver(deal(game, layoutname, seed), processes = 4, splitfactor = 16)
+			state = deal(game, layoutname, seed).backtrack_engine()
+			statehash = state.backtrack_hash()
+			(frontier, solution) = solver._split(state)
+			self.assertEqual(state.backtrack_hash(), statehash)
+			if solution is not None:
+				continue
+			self.assertGreaterEqual(len(frontier), 4 * 16, (game, layoutname, seed))
+			hashes = set()
+			for prefix in frontier:
+				for choice in prefix:
+					self.assertIn(choice, list(state.backtrack_choices()))
+					state.backtrack_makechoice(choice)
+				hashes.add(state.backtrack_hash())
+				for choice in reversed(prefix):
+					state.backtrack_reversechoice(choice)
+			self.assertEqual(len(hashes), len(frontier))
+
+if __name__ == "__main__":
+	unittest.main()
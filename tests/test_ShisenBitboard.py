@@ -0,0 +1,164 @@
+#!/usr/bin/python3
+#
+#	pyglmahjong - Python OpenGL Mahjong and Shisen implementation
+#	Copyright (C) 2015-2018 Johannes Bauer
+#
+#	This file is part of pyglmahjong.
+#
+#	pyglmahjong is free software; you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation; this program is ONLY licensed under
+#	version 3 of the License, later versions are explicitly excluded.
+#
+#	pyglmahjong is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with pyglmahjong; if not, write to the Free Software
+#	Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+#	Johannes Bauer <JohannesBauer@gmx.de>
+
+import random
+import itertools
+import unittest
+
+from Backtracking import BacktrackingSolver
+from ShisenGrid import ShisenGrid
+from ShisenBitboard import ShisenBitboard
+from tests.boards import shisen_paths
+
+class ShisenBitboardTests(unittest.TestCase):
+	(_WIDTH, _HEIGHT) = (6, 5)
+	_BOUNDS = (-3, -3, _WIDTH + 2, _HEIGHT + 2)
+
+	def _position(self, seed):
+		"""Returns a dict of (x, y) to tile ID of a random position that
+		fills the grid with two tiles of four copies and pairs of all
+		others. Roughly half of them are unsolvable."""
+		rnd = random.Random(seed)
+		cells = list(itertools.product(range(self._WIDTH), range(self._HEIGHT)))
+		rnd.shuffle(cells)
+		tileids = [ 0 ] * 4 + [ 1 ] * 4 + [ 2 + (index // 2) for index in range(len(cells) - 8) ]
+		return dict(zip(cells, tileids))
+
+	def _engine(self, position):
+		grid = ShisenGrid(0, 0, self._WIDTH - 1, self._HEIGHT - 1)
+		return ShisenBitboard(grid, [ (x, y, tileid) for ((x, y), tileid) in position.items() ])
+
+	def _pairs(self, position):
+		occupied = set(position)
+		return set((cell1, cell2) for (cell1, cell2) in itertools.combinations(sorted(position), 2) if (position[cell1] == position[cell2]) and (cell2 in shisen_paths(occupied, self._BOUNDS, cell1)))
+
+	def _solvable(self, position, memo):
+		key = frozenset(position.items())
+		if key not in memo:
+			memo[key] = (len(position) == 0) or any(self._solvable({ cell: tileid for (cell, tileid) in position.items() if cell not in pair }, memo) for pair in self._pairs(position))
+		return memo[key]
+
+	def _coordinates(self, engine, choices):
+		return set(tuple(sorted(engine.coordinates(cell) for cell in choice)) for choice in choices)
+
+	def test_pairs(self):
+		for seed in range(20):
+			position = self._position(seed)
+			engine = self._engine(position)
+			rnd = random.Random(seed)
+			while True:
+				choices = list(engine.backtrack_allchoices())
+				self.assertEqual(self._coordinates(engine, choices), self._pairs(position))
+				self.assertLessEqual(set(engine.backtrack_choices()), set(choices))
+				if len(choices) == 0:
+					break
+				# Making and reversing a choice restores the position
+				(pairs, hashvalue) = (set(choices), engine.backtrack_hash())
+				for choice in choices:
+					engine.backtrack_makechoice(choice)
+					engine.backtrack_reversechoice(choice)
+				self.assertEqual((set(engine.backtrack_allchoices()), engine.backtrack_hash()), (pairs, hashvalue))
+				choice = rnd.choice(choices)
+				for cell in choice:
+					del position[engine.coordinates(cell)]
+				engine.backtrack_makechoice(choice)
+
+	def test_sleepsets(self):
+		for seed in range(10):
+			position = self._position(seed)
+			engine = self._engine(position)
+			rnd = random.Random(seed)
+			while True:
+				choices = list(engine.backtrack_allchoices())
+				if len(choices) == 0:
+					break
+				for choice in choices:
+					# Every choice kept asleep after another one is still
+					# available after it and leads to the same position in
+					# either order
+					for other in engine.backtrack_sleepset(choices, choice):
+						engine.backtrack_makechoice(choice)
+						self.assertIn(other, list(engine.backtrack_allchoices()))
+						engine.backtrack_makechoice(other)
+						state = (engine.backtrack_hash(), set(engine.backtrack_allchoices()))
+						engine.backtrack_reversechoice(other)
+						engine.backtrack_reversechoice(choice)
+						engine.backtrack_makechoice(other)
+						engine.backtrack_makechoice(choice)
+						self.assertEqual((engine.backtrack_hash(), set(engine.backtrack_allchoices())), state)
+						engine.backtrack_reversechoice(choice)
+						engine.backtrack_reversechoice(other)
+				engine.backtrack_makechoice(rnd.choice(choices))
+
+	def test_forced_moves_and_deadlocks(self):
+		memo = { }
+		(forced, deadlocks) = (0, 0)
+		for seed in range(40):
+			position = self._position(seed)
+			engine = self._engine(position)
+			rnd = random.Random(seed)
+			while True:
+				if engine.deadlock() is not None:
+					deadlocks += 1
+					self.assertFalse(self._solvable(position, memo))
+				choices = list(engine.backtrack_choices())
+				if len(choices) == 0:
+					break
+				if len(choices) < len(list(engine.backtrack_allchoices())):
+					# Only a choice that keeps a solvable position solvable
+					# may be forced
+					forced += 1
+					after = { cell: tileid for (cell, tileid) in position.items() if cell not in set(engine.coordinates(cell) for cell in choices[0]) }
+					self.assertEqual(self._solvable(after, memo), self._solvable(position, memo))
+				choice = rnd.choice(choices)
+				for cell in choice:
+					del position[engine.coordinates(cell)]
+				engine.backtrack_makechoice(choice)
+		self.assertGreater(forced, 0)
+		self.assertGreater(deadlocks, 0)
+
+	def test_solver_verdicts(self):
+		memo = { }
+		verdicts = set()
+		for seed in range(40):
+			position = self._position(seed)
+			engine = self._engine(position)
+			solvable = self._solvable(position, memo)
+			# Without forced moves, the search relies on sleep sets alone
+			unforced = engine.backtrack_clone()
+			unforced._MATCHING_COPIES = 0
+			self.assertEqual(BacktrackingSolver(unforced).run().status, "solved" if solvable else "unsolvable", seed)
+			result = BacktrackingSolver(engine).run()
+			self.assertEqual(result.status, "solved" if solvable else "unsolvable", seed)
+			verdicts.add(result.status)
+			if solvable:
+				for (cell1, cell2) in result.moves:
+					pair = tuple(sorted((engine.coordinates(cell1), engine.coordinates(cell2))))
+					self.assertIn(pair, self._pairs(position))
+					for cell in pair:
+						del position[cell]
+				self.assertEqual(len(position), 0)
+		self.assertEqual(verdicts, { "solved", "unsolvable" })
+
+if __name__ == "__main__":
+	unittest.main()
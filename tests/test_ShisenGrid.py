@@ -0,0 +1,99 @@
+#!/usr/bin/python3
+#
+#	pyglmahjong - Python OpenGL Mahjong and Shisen implementation
+#	Copyright (C) 2015-2018 Johannes Bauer
+#
+#	This file is part of pyglmahjong.
+#
+#	pyglmahjong is free software; you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation; this program is ONLY licensed under
+#	version 3 of the License, later versions are explicitly excluded.
+#
+#	pyglmahjong is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with pyglmahjong; if not, write to the Free Software
+#	Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+#	Johannes Bauer <JohannesBauer@gmx.de>
+
+import random
+import itertools
+import unittest
+
+from ShisenGrid import ShisenGrid
+from ShisenArrayGrid import ShisenArrayGrid
+from tests.boards import deal, shisen_paths
+
+class ShisenGridTests(unittest.TestCase):
+	_BACKENDS = (ShisenGrid, ShisenArrayGrid)
+
+	def _grids(self, width, height, density, seed):
+		"""Yields (grid, occupied, bounds) for random occupancies of both
+		backends. bounds reach farther out than the grid's border, so that
+		the brute force also finds paths the grid would not consider."""
+		rnd = random.Random(seed)
+		occupied = set((x, y) for x in range(width) for y in range(height) if (rnd.random() < density))
+		for backend in self._BACKENDS:
+			grid = backend(0, 0, width - 1, height - 1)
+			for (x, y) in occupied:
+				grid.set(x, y, 0)
+			yield (grid, occupied, (-3, -3, width + 2, height + 2))
+
+	def _assert_path(self, path, start, end, occupied):
+		self.assertEqual(path[0], start)
+		self.assertEqual(path[-1], end)
+		self.assertLessEqual(len(path), 4)
+		for ((x1, y1), (x2, y2)) in zip(path, path[1:]):
+			self.assertTrue((x1 == x2) or (y1 == y2))
+			cells = [ (x, y) for x in range(min(x1, x2), max(x1, x2) + 1) for y in range(min(y1, y2), max(y1, y2) + 1) ]
+			for cell in cells:
+				if cell not in (start, end):
+					self.assertNotIn(cell, occupied)
+
+	def test_reachable(self):
+		for (seed, density) in enumerate((0.3, 0.6, 0.85)):
+			for (grid, occupied, bounds) in self._grids(10, 6, density, seed):
+				for cell in itertools.product(range(10), range(6)):
+					# A path may lead back to the cell itself, which never
+					# matters when looking for its partners
+					reachable = set(grid.coordinates(index) for index in grid.reachable(*cell)) - { cell }
+					self.assertEqual(reachable, shisen_paths(occupied, bounds, cell), (type(grid).__name__, cell))
+
+	def test_connect(self):
+		for (seed, density) in enumerate((0.3, 0.6, 0.85)):
+			for (grid, occupied, bounds) in self._grids(10, 6, density, seed):
+				for (cell1, cell2) in itertools.combinations(sorted(occupied), 2):
+					path = grid.connect(*cell1, *cell2)
+					self.assertEqual(path is not None, cell2 in shisen_paths(occupied, bounds, cell1), (type(grid).__name__, cell1, cell2))
+					if path is not None:
+						self._assert_path([ tuple(point) for point in path ], cell1, cell2, occupied)
+
+	def test_bulk(self):
+		for (grid, occupied, bounds) in self._grids(12, 7, 0.6, 42):
+			cells = sorted(occupied)
+			pairs = list(itertools.combinations(cells, 2))
+			expected = [ cell2 in shisen_paths(occupied, bounds, cell1) for (cell1, cell2) in pairs ]
+			self.assertEqual([ bool(valid) for valid in grid.connectable(pairs) ], expected)
+			groups = [ cells[0::3], cells[1::3], cells[2::3] ]
+			expected = [ (group, index1, index2) for (group, members) in enumerate(groups) for (index1, index2) in itertools.combinations(range(len(members)), 2) if members[index2] in shisen_paths(occupied, bounds, members[index1]) ]
+			self.assertEqual(list(grid.connected_pairs(groups)), expected)
+
+	def test_board_valid_moves(self):
+		for backend in ("grid", "numpy"):
+			board = deal("shisen", "14x6", 1, backend)
+			rnd = random.Random(1)
+			while True:
+				pairs = list(itertools.combinations(board.iterpieces(), 2))
+				self.assertEqual(board.valid_moves(pairs), [ bool(board.valid_move(piece1, piece2)) for (piece1, piece2) in pairs ])
+				moves = list(board.possible_moves())
+				if len(moves) == 0:
+					break
+				board.remove_piece(*rnd.choice(moves))
+
+if __name__ == "__main__":
+	unittest.main()
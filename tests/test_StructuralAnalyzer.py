@@ -0,0 +1,71 @@
+#!/usr/bin/python3
+#
+#	pyglmahjong - Python OpenGL Mahjong and Shisen implementation
+#	Copyright (C) 2015-2018 Johannes Bauer
+#
+#	This file is part of pyglmahjong.
+#
+#	pyglmahjong is free software; you can redistribute it and/or modify
+#	it under the terms of the GNU General Public License as published by
+#	the Free Software Foundation; this program is ONLY licensed under
+#	version 3 of the License, later versions are explicitly excluded.
+#
+#	pyglmahjong is distributed in the hope that it will be useful,
+#	but WITHOUT ANY WARRANTY; without even the implied warranty of
+#	MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#	GNU General Public License for more details.
+#
+#	You should have received a copy of the GNU General Public License
+#	along with pyglmahjong; if not, write to the Free Software
+#	Foundation, Inc., 59 Temple Place, Suite 330, Boston, MA  02111-1307  USA
+#
+#	Johannes Bauer <JohannesBauer@gmx.de>
+
+import random
+import unittest
+import collections
+
+from StructuralAnalyzer import StructuralAnalyzer
+from Backtracking import BacktrackingSolver
+from tests.boards import deal, mahjong_stacks, mahjong_moves, mahjong_solvable
+
+class StructuralAnalyzerTests(unittest.TestCase):
+	def test_stacks(self):
+		memo = { }
+		rules = collections.Counter()
+		for seed in range(200):
+			(graph, tileids, pieces) = mahjong_stacks(seed)
+			analyzer = StructuralAnalyzer(graph)
+			slots = { tuple(graph.gridpiece(slot)): slot for slot in range(len(tileids)) }
+			rnd = random.Random(seed)
+			while True:
+				slottiles = [ None ] * len(tileids)
+				for (position, piece) in pieces.items():
+					slottiles[slots[position]] = piece.tileid
+				deadlock = analyzer.analyze(slottiles)
+				if deadlock is not None:
+					rules[deadlock.rule] += 1
+					self.assertFalse(mahjong_solvable(pieces, 2, memo), "%d: %s" % (seed, deadlock.description))
+				moves = list(mahjong_moves(pieces, 2))
+				if len(moves) == 0:
+					break
+				move = rnd.choice(moves)
+				pieces = { position: piece for (position, piece) in pieces.items() if piece not in move }
+		self.assertEqual(set(rules), { "covered-copies", "crossed-pairs", "interleaved-row" })
+
+	def test_deals(self):
+		flagged = 0
+		for seed in range(8):
+			board = deal("mahjong", "easy", seed)
+			rnd = random.Random(seed)
+			while board.possible_movecnt() > 0:
+				deadlock = board.structural_deadlock()
+				if deadlock is not None:
+					flagged += 1
+					self.assertNotEqual(BacktrackingSolver(board).run(nodelimit = 100000).status, "solved", "%d: %s" % (seed, deadlock.description))
+					break
+				board.remove_piece(*rnd.choice(list(board.possible_moves())))
+		self.assertGreater(flagged, 0)
+
+if __name__ == "__main__":
+	unittest.main()